@@ -0,0 +1,137 @@
+from django.contrib import admin
+from django.contrib.admin.utils import quote
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import ValidationError
+from django.http import HttpResponseRedirect
+from django.utils.translation import ugettext_lazy as _
+
+try:
+    from django.urls import reverse
+except ImportError:
+    from django.core.urlresolvers import reverse
+
+from abscrete.models import (AbscreteType, abscrete_concrete_fields,
+                             abscrete_required_fields, abscrete_resolve)
+
+
+class AbscreteTypeListFilter(admin.SimpleListFilter):
+    """
+    Filter on the concrete type of the objects, which only relies on the
+    abscrete field of the root table (no join is required).
+    """
+    title = _('type')
+    parameter_name = 'abscrete_type'
+
+    def lookups(self, request, model_admin):
+        model = model_admin.model
+        return [
+            (leaf._abscrete.field_value, leaf._meta.verbose_name)
+            for leaf in model._abscrete.tree.get_leaves(model)
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+
+        return queryset.filter(
+            **{queryset.model._abscrete.field_name: self.value()}
+        )
+
+
+class AbscreteChangeList(ChangeList):
+    def get_queryset(self, request):
+        # The changelist only displays the fields of the queried model, unless
+        # told otherwise by the model admin
+        return super(AbscreteChangeList, self).get_queryset(request).unresolved()
+
+    def get_results(self, request):
+        super(AbscreteChangeList, self).get_results(request)
+
+        if self.model_admin.requires_concrete_instances(self.list_display):
+            # Only the objects of the current page are resolved, with a single
+            # query per concrete model
+            self.result_list = abscrete_resolve(list(self.result_list))
+
+
+class AbscreteModelAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin for the roots and nodes of an abscrete hierarchy.
+
+    The changelist displays the instances of the model itself, and only
+    retrieves the concrete instances of the current page if one of the
+    columns of `abscrete_list_display` is displayed. The change view of an
+    object redirects to the admin of its concrete model, if registered.
+
+    It is also meant for the leaves : the forms leave out the abscrete field
+    and, in single-table mode, the fields of the other branches of the
+    hierarchy.
+    """
+    #: Columns of list_display which require the concrete instances
+    abscrete_list_display = ()
+
+    def get_changelist(self, request, **kwargs):
+        return AbscreteChangeList
+
+    def requires_concrete_instances(self, list_display):
+        return any(c in self.abscrete_list_display for c in list_display)
+
+    def get_exclude(self, request, obj=None):
+        exclude = list(super(AbscreteModelAdmin, self).get_exclude(request, obj)
+                       or [])
+        # The type of an object is not edited (see convert_to), nor are the
+        # fields of the other branches in single-table mode
+        own_fields = abscrete_concrete_fields(self.model)
+        field_name = self.model._abscrete.field_name
+        return exclude + [
+            f.name for f in self.model._meta.concrete_fields
+            if (f not in own_fields or f.name == field_name) and
+            f.name not in exclude
+        ]
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        formfield = super(AbscreteModelAdmin, self).formfield_for_dbfield(
+            db_field, request, **kwargs
+        )
+        if (formfield is not None and
+                db_field.name in abscrete_required_fields(self.model)):
+            formfield.required = True
+        return formfield
+
+    def get_concrete_admin(self, request, object_id):
+        """
+        :return: the model admin of the concrete model of the object, if it is
+        registered and is not this model admin, None otherwise
+        """
+        if self.model._abscrete.type == AbscreteType.LEAF:
+            return None
+
+        try:
+            branch = self.get_queryset(request).filter(pk=object_id).values_list(
+                self.model._abscrete.field_name, flat=True
+            ).first()
+        except (self.model.DoesNotExist, ValidationError, ValueError):
+            return None
+
+        if branch is None:
+            return None
+
+        concrete_model = self.model._abscrete.tree.get_model(branch)
+        concrete_admin = self.admin_site._registry.get(concrete_model)
+        return concrete_admin if concrete_admin is not self else None
+
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        concrete_admin = self.get_concrete_admin(request, object_id)
+        if concrete_admin is None:
+            return super(AbscreteModelAdmin, self).change_view(
+                request, object_id, form_url, extra_context
+            )
+
+        opts = concrete_admin.model._meta
+        url = reverse(
+            '%s:%s_%s_change' % (self.admin_site.name,
+                                 opts.app_label, opts.model_name),
+            args=(quote(object_id),)
+        )
+        if request.GET:
+            url = '%s?%s' % (url, request.GET.urlencode())
+        return HttpResponseRedirect(url)
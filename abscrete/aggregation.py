@@ -0,0 +1,153 @@
+from collections import OrderedDict
+import sys
+import threading
+
+from django.db import connections, models
+from django.utils import six
+
+#: Prefix of the names of the counts added to the queries of the leaves, to
+# roll up the averages
+COUNT_PREFIX = '_abscrete_count_'
+
+
+def _get_leaf_aggregates(leaf, common, per_type):
+    """
+    :return: an OrderedDict of the aggregates to compute for leaf, with a
+    count of the values of each average
+    """
+    aggregates = OrderedDict(sorted(common.items()))
+    for model, model_aggregates in per_type.items():
+        if leaf in model._abscrete.tree.get_leaves(model):
+            aggregates.update(sorted(model_aggregates.items()))
+
+    for name, aggregate in list(aggregates.items()):
+        if isinstance(aggregate, models.Avg):
+            aggregates[COUNT_PREFIX + name] = models.Count(
+                *aggregate.get_source_expressions()
+            )
+    return aggregates
+
+
+def _roll_up(aggregate, name, results):
+    """
+    :return: a (value, True) tuple holding the value of aggregate over the
+    union of the rows of results, or (None, False) if it can not be computed
+    from the results
+    """
+    if getattr(aggregate, 'distinct', False):
+        return None, False
+
+    values = [r[name] for r in results if r[name] is not None]
+    if isinstance(aggregate, models.Count):
+        return sum(values), True
+    if not values:
+        return None, isinstance(aggregate, (models.Sum, models.Min, models.Max,
+                                            models.Avg))
+    if isinstance(aggregate, models.Sum):
+        return sum(values), True
+    if isinstance(aggregate, models.Min):
+        return min(values), True
+    if isinstance(aggregate, models.Max):
+        return max(values), True
+    if isinstance(aggregate, models.Avg):
+        count_name = COUNT_PREFIX + name
+        total = sum(r[name] * r[count_name]
+                    for r in results if r[name] is not None)
+        return total / sum(r[count_name] for r in results), True
+    return None, False
+
+
+def _run_concurrently(function, items):
+    """
+    Call function on each item in a thread of its own (and thus with its own
+    connections to the database, which are closed once done), then re-raise
+    the first error, if any
+    """
+    errors = []
+
+    def run(item):
+        try:
+            function(item)
+        except Exception:
+            errors.append(sys.exc_info())
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(item,)) for item in items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        six.reraise(*errors[0])
+
+
+def aggregate_by_type(queryset, common=None, per_type=None, parallel=False):
+    """
+    Compute aggregates over the instances of queryset, by leaf model : a
+    single query is made per leaf model, restricted to the rows of queryset
+    by a subquery (so that the filters on the queried model apply), and
+    computing both the common aggregates and the aggregates of the fields of
+    the leaf. The results are then rolled up through the nodes, up to the
+    queried model, for the Count, Sum, Min, Max and Avg (without distinct)
+    that are computed under the same name for all the leaves below each
+    model.
+
+    :param common: a dict of the aggregates to compute for all the leaves
+    :param per_type: a dict of the dicts of aggregates to compute for the
+    leaves below a given model, e.g. {Movie: {'duration':
+    Avg('duration_in_minutes')}}
+    :param parallel: make the queries of the leaves concurrently, each on a
+    connection of its own (which can not see the changes of an uncommitted
+    transaction)
+    :return: an OrderedDict of the dicts of aggregates, by model : the queried
+    model first, then the models below it, parents first
+    """
+    model = queryset.model
+    common = common or {}
+    per_type = per_type or {}
+    leaves = model._abscrete.tree.get_leaves(model)
+    for m in per_type:
+        if not set(m._abscrete.tree.get_leaves(m)) <= set(leaves):
+            raise TypeError('{} is not a model below {}'.format(
+                m.__name__, model.__name__
+            ))
+
+    query = queryset.query
+    if query.low_mark or query.high_mark is not None:
+        pks = queryset.values('pk')
+    else:
+        pks = queryset.order_by().values('pk')
+
+    db = queryset.db
+    aggregates = {leaf: _get_leaf_aggregates(leaf, common, per_type)
+                  for leaf in leaves}
+    results = {}
+
+    def aggregate_leaf(leaf):
+        results[leaf] = leaf.objects.using(db).filter(
+            pk__in=pks
+        ).aggregate(**aggregates[leaf])
+
+    if parallel and len(leaves) > 1:
+        _run_concurrently(aggregate_leaf, leaves)
+    else:
+        for leaf in leaves:
+            aggregate_leaf(leaf)
+
+    by_model = OrderedDict()
+    for m in [model] + model._abscrete.tree.get_descendants(model):
+        below = m._abscrete.tree.get_leaves(m)
+        by_model[m] = values = {}
+        for name, aggregate in aggregates[below[0]].items():
+            if name.startswith(COUNT_PREFIX):
+                continue
+            if len(below) == 1:
+                values[name] = results[below[0]][name]
+            elif all(type(aggregates[leaf].get(name)) is type(aggregate)
+                     for leaf in below):
+                value, rolled_up = _roll_up(aggregate, name,
+                                            [results[leaf] for leaf in below])
+                if rolled_up:
+                    values[name] = value
+    return by_model
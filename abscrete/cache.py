@@ -0,0 +1,107 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet, ImproperlyConfigured
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from abscrete.models import AbscreteType
+
+
+def is_enabled():
+    return getattr(settings, 'ABSCRETE_CACHE', None) is not None
+
+
+def get_cache(alias=None):
+    """
+    :param alias: the alias of the cache (by default, the one of the
+    ABSCRETE_CACHE setting)
+    """
+    if not is_enabled():
+        raise ImproperlyConfigured(
+            'The ABSCRETE_CACHE setting must be set to the alias of the cache '
+            'used to cache querysets'
+        )
+    return caches[alias or settings.ABSCRETE_CACHE]
+
+
+def _version_key(model):
+    abscrete = model._abscrete
+    root = model if abscrete.type == AbscreteType.ROOT else abscrete.branch.root
+    return 'abscrete:version:%s' % root._meta.label_lower
+
+
+def get_version(model):
+    """
+    :return: the current version of the hierarchy of model, which changes
+    each time an instance of any model of the hierarchy is written (the
+    versions are always kept in the cache of the ABSCRETE_CACHE setting,
+    whatever the cache holding the results)
+    """
+    cache = get_cache()
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(model, using=None):
+    """
+    Invalidate all the cached querysets of the hierarchy of model (which is
+    done automatically when an instance is saved or deleted, or when a
+    queryset is updated). Within a transaction, this is only done once it is
+    committed, so that the rows it writes can not be cached under the new
+    version before they are visible to the other connections.
+
+    :param using: the database the instances are written to
+    """
+    if not is_enabled():
+        return
+
+    def set_version():
+        # A random token is used rather than a counter, so that a version
+        # that was evicted from the cache can never be reused
+        get_cache().set(_version_key(model), uuid.uuid4().hex, None)
+
+    transaction.on_commit(set_version, using=using)
+
+
+def get_key(queryset):
+    """
+    :return: the key under which the results of queryset are cached, or None
+    if the queryset can not match any row
+    """
+    try:
+        sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    except EmptyResultSet:
+        return None
+
+    signature = repr((queryset.db, sql, params,
+                      queryset._iterable_class.__name__,
+                      queryset.abscrete_strategy))
+    return 'abscrete:qs:%s:%s:%s' % (
+        _version_key(queryset.model), get_version(queryset.model),
+        hashlib.md5(signature.encode('utf-8')).hexdigest()
+    )
+
+
+def _on_write(sender, using=None, **kwargs):
+    invalidate(sender, using)
+
+
+def connect_signals(tree):
+    """
+    Connect the invalidation to the writes of the models of tree, one sender
+    at a time, so that the deletions of the other models can still be fast
+    """
+    for root in tree:
+        for m in [root] + tree.get_descendants(root):
+            uid = 'abscrete_cache_%s' % m._meta.label_lower
+            post_save.connect(_on_write, sender=m,
+                              dispatch_uid=uid + '_post_save')
+            post_delete.connect(_on_write, sender=m,
+                                dispatch_uid=uid + '_post_delete')
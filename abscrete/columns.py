@@ -0,0 +1,208 @@
+from collections import OrderedDict
+import itertools
+
+from django.db import models
+
+from abscrete.models import AbscreteType, abscrete_concrete_fields
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class ColumnBatch(object):
+    """
+    The values of some fields of the instances of a model, as a column per
+    field (the first column always holds the pks)
+    """
+    def __init__(self, model, fields, columns):
+        #: The model whose instances are described
+        self.model = model
+        #: The fields of the columns (the first one is the pk)
+        self.fields = fields
+        #: An OrderedDict of the columns (lists, or numpy arrays), by name
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns['pk'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __repr__(self):
+        return '<ColumnBatch: {}, {} rows>'.format(self.model.__name__,
+                                                   len(self))
+
+
+def _iterator(queryset, chunk_size):
+    try:
+        return queryset.iterator(chunk_size=chunk_size)
+    except TypeError:
+        # Before Django 2.0, the chunk size can not be set
+        return queryset.iterator()
+
+
+def _read_columns(queryset, fields, chunk_size):
+    """
+    :return: the values of fields for all the rows of queryset, as a list per
+    field, filled by chunks of rows without building any instance
+    """
+    columns = [[] for _ in fields]
+    rows = _iterator(
+        queryset.values_list(*[f.attname for f in fields]), chunk_size
+    )
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return columns
+        for column, values in zip(columns, zip(*chunk)):
+            column.extend(values)
+
+
+def _get_own_fields(fields):
+    """
+    :return: fields, without the primary keys and the links to the parent
+    tables (which all hold the value of the pk)
+    """
+    return [
+        f for f in fields
+        if not f.primary_key and
+        not (f.is_relation and f.remote_field.parent_link)
+    ]
+
+
+def read_batches(queryset, chunk_size=2000):
+    """
+    Read the instances of queryset as columns : a batch for the queried model,
+    holding its fields (including the abscrete field) for all the instances,
+    in the order of the queryset, then a batch per leaf model with the
+    instances of that leaf, ordered by pk, holding only the fields that the
+    queried model lacks. A single query is made per batch (none for the
+    leaves that do not add any field), and no instance is built.
+
+    :return: an OrderedDict of ColumnBatch, by model
+    """
+    model = queryset.model
+    abscrete = model._abscrete
+    query = queryset.query
+
+    shared_fields = abscrete_concrete_fields(model)
+    fields = [model._meta.pk] + _get_own_fields(shared_fields)
+    batches = OrderedDict()
+    values = _read_columns(queryset, fields, chunk_size)
+    batches[model] = ColumnBatch(
+        model, fields,
+        OrderedDict(zip(['pk'] + [f.name for f in fields[1:]], values))
+    )
+    if abscrete.type == AbscreteType.LEAF:
+        return batches
+
+    # Only the leaves that appear among the results are queried
+    types = values[fields.index(model._meta.get_field(abscrete.field_name))]
+    present = set(types)
+    leaves = [leaf for leaf in abscrete.tree.get_leaves(model)
+              if leaf._abscrete.field_value in present]
+
+    if query.low_mark or query.high_mark is not None:
+        pks = queryset.values('pk')
+    else:
+        pks = queryset.order_by().values('pk')
+
+    shared_names = set(f.name for f in shared_fields)
+    for leaf in leaves:
+        leaf_fields = [leaf._meta.pk] + _get_own_fields([
+            f for f in abscrete_concrete_fields(leaf)
+            if f.name not in shared_names
+        ])
+        if len(leaf_fields) == 1:
+            leaf_values = [sorted(
+                pk for pk, t in zip(values[0], types)
+                if t == leaf._abscrete.field_value
+            )]
+        else:
+            leaf_values = _read_columns(
+                leaf.objects.using(queryset.db).filter(
+                    pk__in=pks
+                ).order_by('pk'),
+                leaf_fields, chunk_size
+            )
+        batches[leaf] = ColumnBatch(
+            leaf, leaf_fields,
+            OrderedDict(zip(['pk'] + [f.name for f in leaf_fields[1:]],
+                            leaf_values))
+        )
+
+    return batches
+
+
+#: The numpy dtypes of the columns of a field class, checked in order (the
+# columns of the other fields, or that hold null values, are object arrays)
+NUMPY_DTYPES = [
+    (models.BooleanField, 'bool'),
+    (models.AutoField, 'int64'),
+    (models.IntegerField, 'int64'),
+    (models.FloatField, 'float64'),
+]
+
+
+def _get_dtype(field, dtypes):
+    if field.is_relation:
+        return _get_dtype(field.target_field, dtypes)
+    for field_class, dtype in dtypes:
+        if isinstance(field, field_class):
+            return dtype
+    return None
+
+
+def to_numpy(batches):
+    """
+    :return: the batches with their columns turned into numpy arrays
+    """
+    if numpy is None:
+        raise ImportError('Converting columns to numpy arrays requires numpy')
+
+    for batch in batches.values():
+        for field, (name, values) in zip(batch.fields,
+                                         list(batch.columns.items())):
+            dtype = _get_dtype(field, NUMPY_DTYPES)
+            if dtype is None or None in values:
+                dtype = object
+            batch.columns[name] = numpy.array(values, dtype=dtype)
+    return batches
+
+
+def _get_arrow_types():
+    return [
+        (models.BooleanField, pyarrow.bool_()),
+        (models.AutoField, pyarrow.int64()),
+        (models.IntegerField, pyarrow.int64()),
+        (models.FloatField, pyarrow.float64()),
+        (models.CharField, pyarrow.string()),
+        (models.TextField, pyarrow.string()),
+    ]
+
+
+def to_arrow(batches):
+    """
+    :return: an OrderedDict of pyarrow.RecordBatch, by model
+    """
+    if pyarrow is None:
+        raise ImportError('Converting columns to Arrow requires pyarrow')
+
+    arrow_types = _get_arrow_types()
+    record_batches = OrderedDict()
+    for model, batch in batches.items():
+        arrays = [
+            pyarrow.array(values, type=_get_dtype(field, arrow_types))
+            for field, values in zip(batch.fields, batch.columns.values())
+        ]
+        record_batches[model] = pyarrow.RecordBatch.from_arrays(
+            arrays, list(batch.columns.keys())
+        )
+    return record_batches
@@ -0,0 +1,304 @@
+import csv
+import io
+import itertools
+import json
+import os
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.utils.six.moves import range
+
+from abscrete.serializers import FieldPlan
+
+#: The formats of the dumped files, by file extension
+FORMATS = ('jsonl', 'csv')
+
+
+def get_partitions(model, partition_size, using=None):
+    """
+    :return: a list of (first pk, last pk + 1) ranges covering all the
+    instances of model, each spanning at most partition_size pks (the pk of
+    model must be an integer)
+    """
+    bounds = model._base_manager.using(using).aggregate(
+        low=models.Min('pk'), high=models.Max('pk')
+    )
+    if bounds['low'] is None:
+        return []
+
+    return [
+        (low, min(low + partition_size, bounds['high'] + 1))
+        for low in range(bounds['low'], bounds['high'] + 1, partition_size)
+    ]
+
+
+def _file_name(leaf, partition_index, format):
+    return '{}.{:05d}.{}'.format(leaf._meta.label_lower, partition_index,
+                                 format)
+
+
+class _Writer(object):
+    """
+    Writer of the rows of a leaf model into a file which is only created once
+    the first row is written
+    """
+    def __init__(self, path, plan, format):
+        self.path = path
+        self.plan = plan
+        self.format = format
+        self.file = None
+        self.rows = 0
+
+    def _open(self):
+        self.file = io.open(self.path, 'w', encoding='utf-8', newline='')
+        if self.format == 'csv':
+            self.csv = csv.writer(self.file)
+            self.csv.writerow(['pk'] + self.plan.names)
+        else:
+            self.dumps = json.JSONEncoder(separators=(',', ':')).encode
+
+    def write(self, values):
+        if self.file is None:
+            self._open()
+
+        plan = self.plan
+        pk = plan.pk_encoder(values[0])
+        encoded = [encoder(v) for encoder, v in zip(plan.encoders, values[1:])]
+        if self.format == 'csv':
+            # Structured values (e.g. summaries) are written as JSON
+            self.csv.writerow([pk] + [
+                json.dumps(v) if isinstance(v, (dict, list)) else v
+                for v in encoded
+            ])
+        else:
+            data = dict(zip(plan.names, encoded))
+            data['pk'] = pk
+            self.file.write(self.dumps(data) + '\n')
+        self.rows += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def dump_partition(model, partition_index, partition, directory,
+                   format='jsonl', using=None, chunk_size=2000):
+    """
+    Dump the instances of the leaves below model whose pk lies within the
+    partition, into a file per leaf model. A single query is made per leaf
+    model, which only reads the concrete fields of the leaf (no instance is
+    built), and the rows are streamed from the database by chunks.
+
+    :param partition: a (first pk, last pk + 1) range, as returned by
+    get_partitions
+    :return: a dict of the number of rows written by leaf model
+    """
+    low, high = partition
+    counts = {}
+    for leaf in model._abscrete.tree.get_leaves(model):
+        plan = FieldPlan(leaf, lossless=True)
+        qs = leaf.objects.using(using).filter(
+            pk__gte=low, pk__lt=high
+        ).order_by('pk').values_list(
+            leaf._meta.pk.attname, *[f.attname for f in plan.fields]
+        )
+
+        writer = _Writer(
+            os.path.join(directory, _file_name(leaf, partition_index, format)),
+            plan, format
+        )
+        try:
+            for values in _iterator(qs, chunk_size):
+                writer.write(values)
+        finally:
+            writer.close()
+        counts[leaf] = writer.rows
+
+    return counts
+
+
+def _iterator(queryset, chunk_size):
+    try:
+        return queryset.iterator(chunk_size=chunk_size)
+    except TypeError:
+        # Before Django 2.0, the chunk size can not be set
+        return queryset.iterator()
+
+
+def _init_worker():
+    # With the spawn start method, the workers start from scratch
+    import django
+    django.setup()
+
+
+def _dump_partition_worker(args):
+    model_label, partition_index, partition, directory, format, using, \
+        chunk_size = args
+    model = apps.get_model(model_label)
+    try:
+        return partition_index, dump_partition(
+            model, partition_index, partition, directory, format, using,
+            chunk_size
+        )
+    finally:
+        connections.close_all()
+
+
+def dump(model, directory, format='jsonl', partition_size=100000, workers=1,
+         using=None, chunk_size=2000):
+    """
+    Dump all the instances of the leaves below model into directory, by pk
+    partitions (see dump_partition). With several workers, the partitions are
+    dumped in parallel by as many processes, each with its own connections to
+    the database, which requires that no transaction is running (the
+    connections of the current process are closed beforehand).
+
+    Only the concrete fields are dumped : the many-to-many relations are left
+    out.
+
+    :return: a dict of the number of rows written by leaf model
+    """
+    if format not in FORMATS:
+        raise ValueError('Unknown dump format {}'.format(format))
+    if workers > 1 and any(connections[alias].in_atomic_block
+                           for alias in connections):
+        raise transaction.TransactionManagementError(
+            'Dumping with several workers closes the connections, which is '
+            'not possible within a transaction'
+        )
+
+    partitions = get_partitions(model, partition_size, using)
+    tasks = [
+        (model._meta.label, i, partition, directory, format, using,
+         chunk_size)
+        for i, partition in enumerate(partitions)
+    ]
+
+    if workers > 1 and len(tasks) > 1:
+        import multiprocessing
+
+        # The connections of the current process must not be shared with the
+        # forked workers
+        connections.close_all()
+        pool = multiprocessing.Pool(min(workers, len(tasks)),
+                                    initializer=_init_worker)
+        try:
+            results = pool.map(_dump_partition_worker, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [
+            (i, dump_partition(model, i, partition, directory, format, using,
+                               chunk_size))
+            for _, i, partition, _, _, _, _ in tasks
+        ]
+
+    counts = {}
+    for _, partition_counts in results:
+        for leaf, rows in partition_counts.items():
+            counts[leaf] = counts.get(leaf, 0) + rows
+    return counts
+
+
+def _read_rows(path, format):
+    """
+    :return: a generator of the rows of a dumped file, as dicts
+    """
+    with io.open(path, encoding='utf-8', newline='') as f:
+        if format == 'csv':
+            for row in csv.DictReader(f):
+                yield row
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _get_value(field, value, format):
+    if format == 'csv' and value == '' and field.null:
+        # CSV can not tell an empty string from a null value
+        return None
+    return field.to_python(value)
+
+
+def load_file(path, batch_size=1000, using=None):
+    """
+    Load a file written by dump into the database, by batches of instances :
+    for each batch, a single INSERT is made per table of the branch of the
+    leaf model (from the root down to the leaf).
+
+    :return: the leaf model of the file and the number of loaded instances
+    """
+    name = os.path.basename(path)
+    label, _, format = name.rsplit('.', 2)
+    leaf = apps.get_model(label)
+    plan = FieldPlan(leaf, lossless=True)
+    pk_field = leaf._meta.pk
+
+    chain = leaf._abscrete.branch.down + [leaf]
+    tables = [m for m in chain if not m._meta.proxy]
+
+    rows = _read_rows(path, format)
+    count = 0
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return leaf, count
+
+        objs = []
+        for row in batch:
+            obj = leaf(**{
+                f.attname: _get_value(f, row[f.name], format)
+                for f in plan.fields if f.name in row
+            })
+            pk = pk_field.to_python(row['pk'])
+            for m in chain:
+                setattr(obj, m._meta.pk.attname, pk)
+            objs.append(obj)
+
+        for m in tables:
+            # The values are inserted as they are, just like loaddata does
+            # (e.g. the auto_now fields keep their dumped value)
+            m._base_manager.using(using)._insert(
+                objs, fields=m._meta.local_concrete_fields, raw=True,
+                using=using
+            )
+        count += len(objs)
+
+
+def load(directory, batch_size=1000, using=None):
+    """
+    Load all the files written by dump in directory, within a single
+    transaction, then reset the sequences of the primary keys of the roots.
+
+    :return: a dict of the number of loaded instances by leaf model
+    """
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.rsplit('.', 1)[-1] in FORMATS
+    )
+
+    counts = {}
+    roots = set()
+    with transaction.atomic(using=using):
+        for name in names:
+            leaf, count = load_file(
+                os.path.join(directory, name), batch_size, using
+            )
+            counts[leaf] = counts.get(leaf, 0) + count
+            roots.add(leaf._abscrete.branch.root)
+
+        connection = connections[using or DEFAULT_DB_ALIAS]
+        statements = connection.ops.sequence_reset_sql(no_style(), list(roots))
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    from abscrete import cache
+    for root in roots:
+        cache.invalidate(root, using)
+
+    return counts
@@ -0,0 +1,90 @@
+import functools
+import heapq
+import itertools
+import operator
+
+from abscrete.models import abscrete_resolve
+
+
+@functools.total_ordering
+class _Descending(object):
+    """
+    Wrapper reversing the comparisons of a value, for the columns sorted in
+    descending order
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def _get_sort_key(model, ordering):
+    """
+    :return: a function returning the sort key of an instance of model,
+    according to ordering
+    """
+    getters = []
+    for o in ordering:
+        name = o.lstrip('-')
+        field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        getter = operator.attrgetter(field.attname)
+        if o.startswith('-'):
+            getter = (lambda g: lambda obj: _Descending(g(obj)))(getter)
+        getters.append(getter)
+
+    return lambda obj: tuple(g(obj) for g in getters)
+
+
+def _decorated(index, queryset, ordering, limit):
+    """
+    :return: the instances of the queryset, not resolved, decorated with
+    their sort key and the index of the queryset (which makes the ordering
+    stable and avoids comparing the instances themselves)
+    """
+    sort_key = _get_sort_key(queryset.model, ordering)
+
+    queryset = queryset.order_by(*ordering).unresolved()
+    if limit is not None:
+        queryset = queryset[:limit]
+
+    for obj in queryset.iterator():
+        yield sort_key(obj), index, obj
+
+
+def merge(querysets, ordering, limit=None, batch_size=100):
+    """
+    Merge querysets of several roots (or nodes) into a single stream, ordered
+    by fields that all of them share.
+
+    Each queryset is sorted by the database and read lazily, and the sorted
+    streams are merged with a heap : the instances are only resolved into their
+    concrete instances once they are about to be yielded, by batches. With a
+    limit, no more than limit rows are read from each queryset.
+
+    :param querysets: AbscreteQuerySets
+    :param ordering: the field names to order by, as for order_by (the values
+    of these fields must not be null)
+    :param limit: the maximum number of instances to yield
+    :param batch_size: the number of instances resolved at once
+    :return: a generator of concrete instances
+    """
+    streams = [
+        _decorated(i, qs, ordering, limit) for i, qs in enumerate(querysets)
+    ]
+    merged = (obj for _, _, obj in heapq.merge(*streams))
+    if limit is not None:
+        merged = itertools.islice(merged, limit)
+
+    while True:
+        batch = list(itertools.islice(merged, batch_size))
+        if not batch:
+            return
+
+        for obj in abscrete_resolve(batch):
+            yield obj
@@ -0,0 +1,310 @@
+from django.apps.registry import Apps
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.migrations.operations.base import Operation
+from django.db.models.query import ModelIterable
+
+
+def get_view_name(root):
+    return '{}_flat'.format(root._meta.db_table)
+
+
+def _get_descendants(root):
+    """
+    :return: the concrete models that inherit from root, parents first (only
+    the parents of the models are used, so that this also works with the
+    historical models of migrations)
+    """
+    descendants = [
+        m for m in root._meta.apps.get_models()
+        if not m._meta.proxy and root in m._meta.get_parent_list()
+    ]
+    return sorted(descendants, key=lambda m: (len(m._meta.get_parent_list()),
+                                              m._meta.label_lower))
+
+
+def _is_parent_link(field):
+    return field.is_relation and field.remote_field.parent_link
+
+
+def get_view_columns(root):
+    """
+    :return: a list of (model, field, column of the view) for all the columns
+    of root and of the models that inherit from it (the columns of the root
+    keep their name, the others are prefixed by the name of their model)
+    """
+    columns = [(root, f, f.column) for f in root._meta.local_concrete_fields]
+    for model in _get_descendants(root):
+        columns.extend(
+            (model, f, '{}_{}'.format(model._meta.model_name, f.column))
+            for f in model._meta.local_concrete_fields
+            if not _is_parent_link(f)
+        )
+    return columns
+
+
+def get_view_sql(root, connection):
+    """
+    :return: the SELECT query of the view of root : the root table joined to
+    the tables of all the models that inherit from it
+    """
+    qn = connection.ops.quote_name
+    root_table = root._meta.db_table
+    root_pk = '{}.{}'.format(qn(root_table), qn(root._meta.pk.column))
+
+    select = [
+        '{}.{} AS {}'.format(qn(model._meta.db_table), qn(f.column), qn(alias))
+        for model, f, alias in get_view_columns(root)
+    ]
+    joins = [
+        'LEFT OUTER JOIN {table} ON {table}.{pk} = {root_pk}'.format(
+            table=qn(model._meta.db_table), pk=qn(model._meta.pk.column),
+            root_pk=root_pk
+        )
+        for model in _get_descendants(root)
+    ]
+    return 'SELECT {} FROM {} {}'.format(', '.join(select), qn(root_table),
+                                         ' '.join(joins)).strip()
+
+
+def supports_materialized_views(connection):
+    return connection.vendor == 'postgresql'
+
+
+def _is_materialized(root, connection):
+    if not supports_materialized_views(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_matviews WHERE matviewname = %s',
+                       [get_view_name(root)])
+        return cursor.fetchone() is not None
+
+
+def drop_view(root, schema_editor):
+    connection = schema_editor.connection
+    kind = ('MATERIALIZED VIEW' if _is_materialized(root, connection)
+            else 'VIEW')
+    schema_editor.execute('DROP {} IF EXISTS {}'.format(
+        kind, connection.ops.quote_name(get_view_name(root))
+    ))
+
+
+def create_view(root, schema_editor, materialized=False):
+    """
+    Create (or replace) the view of root
+
+    :param materialized: create a materialized view, where the backend
+    supports it (PostgreSQL), which is cheaper to read but only holds the rows
+    as of its last refresh_view (the saves and deletes are not reflected until
+    then)
+    """
+    connection = schema_editor.connection
+    drop_view(root, schema_editor)
+
+    kind = ('MATERIALIZED VIEW' if materialized and
+            supports_materialized_views(connection) else 'VIEW')
+    schema_editor.execute('CREATE {} {} AS {}'.format(
+        kind, connection.ops.quote_name(get_view_name(root)),
+        get_view_sql(root, connection)
+    ))
+
+
+def refresh_view(root, using=DEFAULT_DB_ALIAS):
+    """
+    Refresh the view of root, if it is materialized (plain views are always up
+    to date)
+    """
+    connection = connections[using]
+    if _is_materialized(root, connection):
+        with connection.cursor() as cursor:
+            cursor.execute('REFRESH MATERIALIZED VIEW {}'.format(
+                connection.ops.quote_name(get_view_name(root))
+            ))
+
+
+class CreateFlatView(Operation):
+    """
+    Migration operation creating (or regenerating) the view of a root, to be
+    added to a migration each time the models that inherit from the root
+    change. Reversing it drops the view.
+    """
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, model_name, materialized=False):
+        self.model_name = model_name
+        self.materialized = materialized
+
+    def deconstruct(self):
+        kwargs = {'model_name': self.model_name}
+        if self.materialized:
+            kwargs['materialized'] = self.materialized
+        return self.__class__.__name__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        root = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, root):
+            create_view(root, schema_editor, self.materialized)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        root = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, root):
+            drop_view(root, schema_editor)
+
+    def describe(self):
+        return 'Create the flat view of {}'.format(self.model_name)
+
+
+class DropFlatView(CreateFlatView):
+    """
+    Migration operation dropping the view of a root, to be added to a
+    migration before the operations that change the columns of the tables of
+    the hierarchy (which the database may refuse while the view depends on
+    them), the view being created again by a CreateFlatView afterwards.
+    Reversing it creates the view.
+    """
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        super(DropFlatView, self).database_backwards(
+            app_label, schema_editor, from_state, to_state
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        super(DropFlatView, self).database_forwards(
+            app_label, schema_editor, from_state, to_state
+        )
+
+    def describe(self):
+        return 'Drop the flat view of {}'.format(self.model_name)
+
+
+class FlatIterable(ModelIterable):
+    """
+    Iterable turning the rows of a view into instances of the leaf models
+    """
+    def __iter__(self):
+        model = self.queryset.model
+        root = model.abscrete_root
+        tree = root._abscrete.tree
+        type_attname = root._meta.get_field(root._abscrete.field_name).column
+        db = self.queryset.db
+
+        plans = {}
+        for obj in super(FlatIterable, self).__iter__():
+            leaf = tree.get_model(getattr(obj, type_attname))
+            if leaf not in plans:
+                plans[leaf] = model.get_plan(leaf)
+            attnames, columns = plans[leaf]
+            yield leaf.from_db(db, attnames, [getattr(obj, c) for c in columns])
+
+
+class FlatQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super(FlatQuerySet, self).__init__(*args, **kwargs)
+        self._iterable_class = FlatIterable
+
+    def update(self, **kwargs):
+        raise TypeError('{} is read-only'.format(self.model.__name__))
+    update.alters_data = True
+
+    def delete(self):
+        raise TypeError('{} is read-only'.format(self.model.__name__))
+    delete.alters_data = True
+
+
+class FlatModel(models.Model):
+    """
+    Read-only model of the view of a root. Its fields are named after the
+    columns of the view (see get_view_columns), which can be used in lookups,
+    and its querysets return instances of the leaf models.
+    """
+    #: The root whose view is queried
+    abscrete_root = None
+
+    objects = FlatQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_plan(cls, leaf):
+        """
+        :return: the attribute names of leaf and the matching columns of the
+        view
+        """
+        root = cls.abscrete_root
+        pk_column = root._meta.pk.column
+        columns = {(m._meta.concrete_model, f.attname): alias
+                   for m, f, alias in get_view_columns(root)}
+
+        attnames = []
+        view_columns = []
+        for f in leaf._meta.concrete_fields:
+            attnames.append(f.attname)
+            if _is_parent_link(f):
+                view_columns.append(pk_column)
+            else:
+                view_columns.append(columns[(f.model._meta.concrete_model,
+                                             f.attname)])
+        return attnames, view_columns
+
+    def save(self, *args, **kwargs):
+        raise TypeError('{} is read-only'.format(self.__class__.__name__))
+
+    def delete(self, *args, **kwargs):
+        raise TypeError('{} is read-only'.format(self.__class__.__name__))
+
+
+def _get_view_field(field, column, primary_key):
+    if field.is_relation:
+        # Only the value of the related key is exposed
+        field = field.target_field
+
+    field_class = field.__class__
+    if isinstance(field, models.BigAutoField):
+        field_class = models.BigIntegerField
+    elif isinstance(field, models.AutoField):
+        field_class = models.IntegerField
+
+    _, _, args, kwargs = field.deconstruct()
+    for name in ('default', 'unique', 'db_index', 'primary_key', 'null',
+                 'db_column', 'to', 'on_delete', 'related_name'):
+        kwargs.pop(name, None)
+    if primary_key:
+        kwargs['primary_key'] = True
+    else:
+        kwargs['null'] = True
+    return field_class(*args, db_column=column, **kwargs)
+
+
+_flat_models = {}
+
+
+def get_flat_model(root):
+    """
+    :return: the FlatModel of root, which is created the first time (it is not
+    registered in the application registry, so that it is ignored by the
+    migrations)
+    """
+    if root not in _flat_models:
+        attrs = {
+            '__module__': root.__module__,
+            'abscrete_root': root,
+            'Meta': type('Meta', (), {
+                'managed': False,
+                'db_table': get_view_name(root),
+                'app_label': root._meta.app_label,
+                'apps': Apps(installed_apps=()),
+            }),
+        }
+        for model, f, column in get_view_columns(root):
+            attrs[column] = _get_view_field(f, column,
+                                            f is root._meta.pk)
+        _flat_models[root] = type('{}Flat'.format(root.__name__),
+                                  (FlatModel,), attrs)
+    return _flat_models[root]
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+
+from django.db import models, transaction
+
+from abscrete.models import get_branch_lookup
+
+#: Rows of the root whose abscrete field matches no leaf of the hierarchy
+UNKNOWN = 'unknown'
+#: Rows of the root whose abscrete field points below a model, without any
+# matching row in the table of that model
+MISSING = 'missing'
+#: Rows of the table of a model whose root row has an abscrete field that does
+# not point below that model
+EXTRA = 'extra'
+
+
+def _type_filter(model):
+    """
+    :return: the condition matching the rows whose abscrete field points to
+    model or to a model below it
+    """
+    abscrete = model._abscrete
+    path = abscrete.branch.path_from_root(model)
+    return (models.Q(**{abscrete.field_name: path}) |
+            models.Q(**{abscrete.field_name + '__startswith': path + '.'}))
+
+
+def get_mismatches(root, using=None):
+    """
+    Build the queries that find the rows of a hierarchy whose abscrete field
+    does not match the tables that hold them : a query for the unknown types,
+    then for each model below the root, an anti-join for the missing rows and
+    a join for the extra rows. No query is made by this function.
+
+    :return: a list of (model, kind, queryset of the pks) tuples, where kind
+    is one of UNKNOWN, MISSING or EXTRA
+    """
+    abscrete = root._abscrete
+    descendants = abscrete.tree.get_descendants(root)
+    root_qs = root._base_manager.using(using)
+
+    known = [leaf._abscrete.field_value
+             for leaf in abscrete.tree.get_leaves(root)]
+    mismatches = [(root, UNKNOWN, root_qs.exclude(**{
+        abscrete.field_name + '__in': known
+    }))]
+    if abscrete.single_table:
+        # There are no child tables
+        return mismatches
+
+    for model in descendants:
+        mismatches.append((model, MISSING, root_qs.filter(
+            _type_filter(model), **{get_branch_lookup(model) + '__isnull': True}
+        )))
+        mismatches.append((model, EXTRA, model._base_manager.using(
+            using
+        ).exclude(_type_filter(model))))
+    return mismatches
+
+
+def check(root, using=None):
+    """
+    :return: an OrderedDict of the number of mismatching rows, by (model,
+    kind) (see get_mismatches)
+    """
+    return OrderedDict(
+        ((model, kind), qs.count())
+        for model, kind, qs in get_mismatches(root, using)
+    )
+
+
+def _iter_batches(queryset, batch_size):
+    """
+    :return: a generator of lists of pks of queryset, by increasing pk
+    """
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last = None
+    while True:
+        qs = queryset if last is None else queryset.filter(pk__gt=last)
+        pks = list(qs[:batch_size])
+        if not pks:
+            return
+        yield pks
+        last = pks[-1]
+
+
+def repair(root, batch_size=500, using=None):
+    """
+    Set the abscrete field of the mismatching rows to the leaf whose tables
+    (from the root down to the leaf) hold them, by batches of pks. The rows
+    that are held by no leaf, or by several of them, are left as they are.
+    This is not possible in single-table mode, where the tables can not tell
+    the type of a row.
+
+    :return: the number of repaired rows and the set of the pks of the rows
+    that could not be repaired
+    """
+    if root._abscrete.single_table:
+        raise TypeError('The instances of {} can not be repaired, since they '
+                        'are stored in a single table'.format(root.__name__))
+
+    abscrete = root._abscrete
+    leaves = abscrete.tree.get_leaves(root)
+    root_qs = root._base_manager.using(using)
+
+    repaired = set()
+    unrepairable = set()
+    for model, kind, qs in get_mismatches(root, using):
+        for pks in _iter_batches(qs, batch_size):
+            leaves_by_pk = {}
+            for leaf in leaves:
+                found = root_qs.filter(
+                    pk__in=pks, **{get_branch_lookup(leaf) + '__isnull': False}
+                ).values_list('pk', flat=True)
+                for pk in found:
+                    leaves_by_pk.setdefault(pk, []).append(leaf)
+
+            pks_by_leaf = {}
+            for pk in pks:
+                found = leaves_by_pk.get(pk, [])
+                if len(found) == 1:
+                    pks_by_leaf.setdefault(found[0], []).append(pk)
+                else:
+                    unrepairable.add(pk)
+
+            with transaction.atomic(using=using):
+                for leaf, leaf_pks in pks_by_leaf.items():
+                    root_qs.filter(pk__in=leaf_pks).update(
+                        **dict(abscrete.get_modified_values(), **{
+                            abscrete.field_name: leaf._abscrete.field_value
+                        })
+                    )
+                    repaired.update(leaf_pks)
+
+    from abscrete import cache
+    cache.invalidate(root, using)
+    return len(repaired), unrepairable - repaired
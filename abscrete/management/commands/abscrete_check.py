@@ -0,0 +1,66 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from abscrete import integrity
+from abscrete.models import AbscreteType
+
+
+class Command(BaseCommand):
+    help = (
+        'Check that the abscrete field of all the instances of a root matches '
+        'the tables that hold them, and optionally repair the mismatches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='The root, as app_label.Model')
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Repair the mismatches, when the tables tell the type'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='The number of rows repaired at once'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='The database to check'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        if (not AbscreteType.is_abscrete(model) or
+                model._abscrete.type != AbscreteType.ROOT):
+            raise CommandError('{} is not an abscrete root'.format(
+                options['model']
+            ))
+
+        using = options['database']
+        counts = integrity.check(model, using)
+        mismatches = 0
+        for (m, kind), count in counts.items():
+            if count:
+                self.stdout.write('{}: {} {} rows'.format(m._meta.label,
+                                                         count, kind))
+                mismatches += count
+        if not mismatches:
+            self.stdout.write('No mismatch')
+            return
+
+        if not options['fix']:
+            raise CommandError('{} mismatched rows'.format(mismatches))
+
+        repaired, unrepairable = integrity.repair(
+            model, batch_size=options['batch_size'], using=using
+        )
+        self.stdout.write('{} rows repaired'.format(repaired))
+        if unrepairable:
+            raise CommandError(
+                '{} rows could not be repaired : {}'.format(
+                    len(unrepairable),
+                    ', '.join(str(pk) for pk in sorted(unrepairable))
+                )
+            )
@@ -0,0 +1,62 @@
+import os
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from abscrete import dump
+from abscrete.models import AbscreteType
+
+
+class Command(BaseCommand):
+    help = (
+        'Dump all the instances below an abscrete root (or node) into a file '
+        'per leaf model and pk partition, as JSON Lines or CSV.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='The root or node, as app_label.Model')
+        parser.add_argument('directory', help='The output directory')
+        parser.add_argument(
+            '--format', default='jsonl', choices=dump.FORMATS,
+            help='The format of the files (default: jsonl)'
+        )
+        parser.add_argument(
+            '--partition-size', type=int, default=100000,
+            help='The number of pks spanned by each partition'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='The number of processes dumping the partitions in parallel'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='The number of rows read from the database at once'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='The database to dump from'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        if not AbscreteType.is_abscrete(model):
+            raise CommandError('{} is not an abscrete model'.format(
+                options['model']
+            ))
+
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        counts = dump.dump(
+            model, directory, format=options['format'],
+            partition_size=options['partition_size'],
+            workers=options['workers'], using=options['database'],
+            chunk_size=options['chunk_size']
+        )
+        for leaf, rows in sorted(counts.items(), key=lambda i: i[0].__name__):
+            self.stdout.write('{}: {} rows'.format(leaf._meta.label, rows))
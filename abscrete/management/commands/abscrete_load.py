@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from abscrete import dump
+
+
+class Command(BaseCommand):
+    help = (
+        'Load the files written by abscrete_dump, with batched inserts per '
+        'table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='The directory of the dump')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='The number of instances inserted at once'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='The database to load into'
+        )
+
+    def handle(self, *args, **options):
+        counts = dump.load(options['directory'],
+                           batch_size=options['batch_size'],
+                           using=options['database'])
+        for leaf, rows in sorted(counts.items(), key=lambda i: i[0].__name__):
+            self.stdout.write('{}: {} rows'.format(leaf._meta.label, rows))
@@ -1,11 +1,25 @@
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict, defaultdict, namedtuple
 import functools
+import itertools
+import json
+import random
 import sys
 
-from django.db.models.query import QuerySet, ModelIterable
-from django.db import models
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.query import QuerySet, ModelIterable, RawQuerySet
+from django.db.models.query_utils import InvalidQuery
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db import connections, models, router, transaction
 from django.db.models.base import ModelBase
-from django.utils import six
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Coalesce
+from django.db.models.deletion import Collector
+from django.db.models.fields.related_descriptors import \
+    ForwardOneToOneDescriptor
+from django.utils import six, timezone
+
+from abscrete import signals
 
 
 def abscrete_application_ready(app):
@@ -13,6 +27,10 @@ def abscrete_application_ready(app):
         if AbscreteType.is_abscrete(m):
             m._abscrete.tree.prune(m)
 
+    from abscrete import cache
+    if cache.is_enabled():
+        cache.connect_signals(AbscreteModelBase.tree)
+
 
 # Recursive setattr/getattr functions : https://stackoverflow.com/a/31174427
 def rsetattr(obj, attr, val):
@@ -199,21 +217,107 @@ class AbscreteTree(OrderedDict):
     def get_model(self, branch_as_str):
         return self._by_str[branch_as_str]
 
+    def get_leaves(self, model):
+        """
+        :param model: a root, node or leaf model
+        :return: the list of the leaf models below model, in the order they
+        were declared (or a list with only model if it is itself a leaf)
+        """
+        leaves = []
+        to_visit = [(model, self[model])]
+        while to_visit:
+            current, children = to_visit.pop(0)
+            if children == OrderedDict():
+                leaves.append(current)
+            else:
+                to_visit = list(children.items()) + to_visit
+
+        return leaves
+
+    def get_descendants(self, model):
+        """
+        :param model: a root, node or leaf model
+        :return: the list of the nodes and leaves below model, parents first
+        """
+        descendants = []
+        to_visit = list(self[model].items())
+        while to_visit:
+            current, children = to_visit.pop(0)
+            descendants.append(current)
+            to_visit = list(children.items()) + to_visit
+
+        return descendants
+
 
 class AbscreteMeta:
-    def __init__(self, model_name, type, branch, tree):
+    def __init__(self, model_name, type, branch, tree, single_table=False,
+                 track_changes=False, summary=None, sort_fields=None,
+                 modified=False):
         self.model_name = model_name
         self.type = type
         self.branch = branch
         self.tree = tree
+        #: Whether the whole hierarchy is stored in the table of the root
+        self.single_table = single_table
+        #: Whether saving an instance only writes the fields that changed
+        # since it was loaded
+        self.track_changes = track_changes
+        #: In single-table mode, the names of the fields declared by the model
+        # but actually stored in the root table
+        self.single_table_fields = []
+        #: In single-table mode, the names of the fields declared by the model
+        # that may not be blank, although the ones of the root table may
+        self.single_table_required_fields = []
+        #: The names of the fields copied into the summary field of the root,
+        # by lowercase model name (None if the root has no summary field)
+        self.summary = summary
+        #: The virtual fields of the root that querysets can be ordered by,
+        # as dicts of the names of the fields holding their value, by
+        # lowercase model name
+        self.sort_fields = sort_fields or {}
+        #: Whether the root holds the time its instances were last written
+        # (in any table of their branch)
+        self.modified = modified
 
     @property
-    def field_name(self):
+    def root_model_name(self):
         if self.type == AbscreteType.NODE or self.type == AbscreteType.LEAF:
-            root_model_name = self.branch.root._meta.model_name
-        else:
-            root_model_name = self.model_name
-        return self.to_field_name(root_model_name)
+            return self.branch.root._meta.model_name
+        return self.model_name
+
+    @property
+    def field_name(self):
+        return self.to_field_name(self.root_model_name)
+
+    @property
+    def summary_field_name(self):
+        return self.to_summary_field_name(self.root_model_name)
+
+    @property
+    def modified_field_name(self):
+        return self.to_modified_field_name(self.root_model_name)
+
+    def get_modified_values(self):
+        """
+        :return: the values to write along with any change of the instances,
+        i.e. the current time for the modification time of the root (if any)
+        """
+        if not self.modified:
+            return {}
+        return {self.modified_field_name: timezone.now()}
+
+    def get_summary_fields(self):
+        """
+        :return: the names of the fields of the model that are copied into
+        the summary field (those declared for the model and its parents)
+        """
+        if self.summary is None:
+            return []
+        model_names = [m._abscrete.model_name for m in self.branch.down]
+        names = []
+        for model_name in model_names + [self.model_name]:
+            names.extend(self.summary.get(model_name, ()))
+        return names
 
     @property
     def field_value(self):
@@ -231,6 +335,40 @@ class AbscreteMeta:
     def to_field_name(model_name):
         return 'abscrete_type_%s' % model_name
 
+    @staticmethod
+    def to_summary_field_name(model_name):
+        return 'abscrete_summary_%s' % model_name
+
+    @staticmethod
+    def to_modified_field_name(model_name):
+        return 'abscrete_modified_%s' % model_name
+
+
+class AbscreteSummaryField(models.TextField):
+    """
+    Field holding a dict, stored as JSON
+    """
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', dict)
+        kwargs.setdefault('editable', False)
+        super(AbscreteSummaryField, self).__init__(*args, **kwargs)
+
+    def from_db_value(self, value, *args):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if isinstance(value, six.string_types):
+            return json.loads(value)
+        return value
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        return json.dumps(value, cls=DjangoJSONEncoder, sort_keys=True)
+
+    def value_to_string(self, obj):
+        return self.get_prep_value(self.value_from_object(obj))
+
 
 class AbscreteModelBase(ModelBase):
     TYPE_FIELD_MAX_LENGTH = 200
@@ -239,27 +377,77 @@ class AbscreteModelBase(ModelBase):
     def __new__(cls, name, bases, attrs):
         model_name = name.lower()
         type = AbscreteType.get_type(bases)
+        branch = AbscreteBranch.get(bases)
+
+        if type == AbscreteType.ROOT:
+            single_table = attrs.pop('abscrete_single_table', False)
+            track_changes = attrs.pop('abscrete_track_changes', False)
+            modified = attrs.pop('abscrete_modified', False)
+            summary = attrs.pop('abscrete_summary', None)
+            if summary is not None:
+                summary = {k.lower(): list(v) for k, v in summary.items()}
+            sort_fields = {
+                sort_field: {k.lower(): v for k, v in fields.items()}
+                for sort_field, fields in attrs.pop('abscrete_sort_fields',
+                                                    {}).items()
+            }
+            for sort_field in sort_fields:
+                if sort_field in attrs or sort_field == 'pk':
+                    raise TypeError(
+                        "Sort field {} of model {} clashes with an attribute "
+                        "of the model".format(sort_field, name)
+                    )
+        elif type == AbscreteType.NODE:
+            single_table = branch.root._abscrete.single_table
+            track_changes = branch.root._abscrete.track_changes
+            modified = branch.root._abscrete.modified
+            summary = branch.root._abscrete.summary
+            sort_fields = branch.root._abscrete.sort_fields
+        else:
+            single_table = track_changes = modified = False
+            summary = None
+            sort_fields = None
 
         attrs.update({
             '_abscrete': AbscreteMeta(
                 model_name=model_name,
                 type=type,
-                branch=AbscreteBranch.get(bases),
-                tree=cls.tree
+                branch=branch,
+                tree=cls.tree,
+                single_table=single_table,
+                track_changes=track_changes,
+                summary=summary,
+                sort_fields=sort_fields,
+                modified=modified
             )
         })
 
         if type == AbscreteType.ROOT:
             attrs.update({
                 AbscreteMeta.to_field_name(model_name): models.CharField(
-                    max_length=cls.TYPE_FIELD_MAX_LENGTH
+                    max_length=cls.TYPE_FIELD_MAX_LENGTH,
+                    db_index=True
                 )
             })
+            if summary is not None:
+                attrs[AbscreteMeta.to_summary_field_name(model_name)] = \
+                    AbscreteSummaryField()
+            if modified:
+                attrs[AbscreteMeta.to_modified_field_name(model_name)] = \
+                    models.DateTimeField(null=True, db_index=True,
+                                         editable=False)
+        elif single_table:
+            cls._move_to_root_table(name, branch.root, attrs)
 
         new_class = super(AbscreteModelBase, cls).__new__(cls, name, bases, attrs)
         if type != AbscreteType.GROUND:
             cls.tree.add(new_class)
 
+        for link in new_class._meta.parents.values():
+            if link is not None and link.model is new_class:
+                setattr(new_class, link.name,
+                        AbscreteParentLinkDescriptor(link))
+
         if new_class._abscrete.type == AbscreteType.NODE:
             def __init__(self, *args, **kwargs):
                 super(new_class, self).__init__(*args, **kwargs)
@@ -283,6 +471,499 @@ class AbscreteModelBase(ModelBase):
 
         return new_class
 
+    @classmethod
+    def _move_to_root_table(cls, name, root, attrs):
+        """
+        In single-table mode, nodes and leaves are proxies of the root model,
+        and the fields they declare are added to the root model instead, as
+        nullable fields since they are not relevant for the other models of the
+        hierarchy (and blank ones, so that they are only required for the
+        models of their branch, see AbscreteModel.clean_fields).
+
+        :param name: the name of the model being built
+        :param root: the root model of the hierarchy
+        :param attrs: the attributes of the model being built, updated in place
+        """
+        fields = [(k, v) for k, v in list(attrs.items())
+                  if isinstance(v, models.Field)]
+
+        for field_name, field in fields:
+            root_fields = root._meta.local_fields + root._meta.local_many_to_many
+            if any(f.name == field_name for f in root_fields):
+                raise TypeError(
+                    "Field {} of model {} clashes with a field of the table of "
+                    "its root model {}".format(field_name, name,
+                                               root.__name__)
+                )
+            del attrs[field_name]
+            if not field.blank:
+                attrs['_abscrete'].single_table_required_fields.append(
+                    field_name
+                )
+            field.null = field.blank = True
+            root.add_to_class(field_name, field)
+            attrs['_abscrete'].single_table_fields.append(field_name)
+
+        if fields:
+            # The fields of the models of the hierarchy that have already been
+            # built are cached, and must now include the new fields
+            for m in cls.tree._by_str.values():
+                if m._meta.concrete_model is root:
+                    m._meta._expire_cache()
+
+        meta = attrs.get('Meta')
+        attrs['Meta'] = type('Meta', (meta,) if meta else (), {'proxy': True})
+
+
+#: A query run (or to be run) to retrieve concrete instances : the model it
+# returns instances of, the database alias, the SQL and its parameters, the
+# number of pks it retrieves (None for the query of the queried model itself)
+# and the plan of the database (only with Django >= 2.1, when asked for)
+ResolutionQuery = namedtuple(
+    'ResolutionQuery', ['model', 'using', 'sql', 'params', 'pk_count', 'plan']
+)
+
+
+def _get_resolution_query(queryset, pk_count=None, explain=False):
+    sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    plan = None
+    if explain and hasattr(queryset, 'explain'):
+        plan = queryset.explain()
+    return ResolutionQuery(queryset.model, queryset.db, sql, params, pk_count,
+                           plan)
+
+
+def abscrete_resolve(objects, using=None):
+    """
+    Turn a list of abscrete instances into their concrete instances, with a
+    single query per concrete model. Objects that already are concrete
+    instances are returned as is.
+
+    :param objects: instances of abscrete models (roots, nodes or leaves)
+    :param using: the database alias from which the concrete instances are
+    retrieved (by default, the database each object was loaded from)
+    :return: the list of the concrete instances, in the same order as objects
+    """
+    concrete_models = []
+    pks_by_model = defaultdict(list)
+    results = {}
+    for o in objects:
+        concrete_model = o._abscrete.tree.get_model(o.abscrete_branch)
+        concrete_models.append(concrete_model)
+        if o.__class__ is concrete_model:
+            continue
+
+        if concrete_model._abscrete.single_table:
+            # The row of the root table already holds all the fields
+            results[(concrete_model, o.pk)] = _copy_as(o, concrete_model)
+        else:
+            pks_by_model[(concrete_model, using or o._state.db)].append(o.pk)
+
+    record = signals.resolved.has_listeners()
+    queries = []
+    for (concrete_model, db), pks in pks_by_model.items():
+        qs = concrete_model.objects.using(db).filter(pk__in=pks)
+        if record:
+            queries.append(_get_resolution_query(qs, len(pks)))
+        for r in qs:
+            results[(concrete_model, r.pk)] = r
+
+    if record:
+        signals.resolved.send(sender=abscrete_resolve, count=len(objects),
+                              queries=queries)
+
+    return [
+        o if o.__class__ is concrete_model else results[(concrete_model, o.pk)]
+        for o, concrete_model in zip(objects, concrete_models)
+    ]
+
+
+def _copy_as(obj, model):
+    """
+    :return: an instance of model built from the fields loaded in obj, which
+    must share its table with model
+    """
+    field_names, values = [], []
+    for f in model._meta.concrete_fields:
+        if f.attname in obj.__dict__:
+            field_names.append(f.attname)
+            values.append(obj.__dict__[f.attname])
+
+    return model.from_db(obj._state.db, field_names, values)
+
+
+class AbscreteParentLinkDescriptor(ForwardOneToOneDescriptor):
+    """
+    Descriptor of the links of abscrete models to their parents, which builds
+    the parent instance from the fields already loaded in the child instance,
+    the first time it is accessed : going up the branch of an instance
+    (through e.g. obj.parent_ptr) costs no query, and the parent instance
+    caches the child one.
+    """
+    def get_object(self, instance):
+        parent = _copy_as(instance, self.field.remote_field.model)
+        parent._state.adding = instance._state.adding
+        return parent
+
+
+def _clear_parent_caches(obj):
+    """
+    Throw away the parent instances cached on obj, which are copies of its
+    fields, so that they are built again on access
+    """
+    for link in obj._meta.parents.values():
+        if link is None:
+            continue
+        if hasattr(link, 'is_cached'):
+            if link.is_cached(obj):
+                link.delete_cached_value(obj)
+        else:
+            # Django < 2.0
+            obj.__dict__.pop(link.get_cache_name(), None)
+
+
+def _clear_stale_relation(field, instance):
+    """
+    Throw away the related instance cached for field on instance, if it does
+    not match the value of the field anymore
+    """
+    if hasattr(field, 'is_cached'):
+        if not field.is_cached(instance):
+            return
+        related = field.get_cached_value(instance)
+    else:
+        # Django < 2.0
+        if field.get_cache_name() not in instance.__dict__:
+            return
+        related = instance.__dict__[field.get_cache_name()]
+
+    local_value = getattr(instance, field.attname)
+    related_value = (None if related is None
+                     else getattr(related, field.target_field.attname))
+    if local_value is None or local_value != related_value:
+        if hasattr(field, 'delete_cached_value'):
+            field.delete_cached_value(instance)
+        else:
+            del instance.__dict__[field.get_cache_name()]
+
+
+def _split_pks(pks, using):
+    """
+    :return: the list of pks split into batches that each fit within the
+    limit of parameters of a query on the database (if any)
+    """
+    pks = list(pks)
+    batch_size = getattr(connections[using].features, 'max_query_params',
+                         None)
+    if not batch_size or len(pks) <= batch_size:
+        return [pks]
+    return [pks[i:i + batch_size] for i in range(0, len(pks), batch_size)]
+
+
+def refresh_many(instances, fields=None, using=None):
+    """
+    Reload the fields of a heterogeneous list of instances from the database,
+    just like refresh_from_db, but with a single query per model (or per
+    batch of pks, if the database limits the number of query parameters)
+    instead of a query per instance.
+
+    :param instances: instances of abscrete models
+    :param fields: if provided, only those fields are reloaded (otherwise all
+    the fields that are not deferred are)
+    :param using: the database alias to reload the instances from (by
+    default, the database each instance was loaded from)
+    :return: none
+    """
+    if fields is not None:
+        fields = list(fields)
+        if not fields:
+            return
+        if any(LOOKUP_SEP in f for f in fields):
+            raise ValueError(
+                'Found "%s" in fields argument. Relations and transforms are '
+                'not allowed in fields.' % LOOKUP_SEP
+            )
+
+    by_model = defaultdict(list)
+    for i in instances:
+        by_model[(i.__class__, using or i._state.db,
+                  frozenset(i.get_deferred_fields()))].append(i)
+
+    for (model, db, deferred_fields), group in by_model.items():
+        qs = model._base_manager.using(db)
+        if fields is not None:
+            qs = qs.only(*fields)
+        elif deferred_fields:
+            qs = qs.only(*[f.attname for f in model._meta.concrete_fields
+                           if f.attname not in deferred_fields])
+
+        db_instances = {}
+        for pks in _split_pks([i.pk for i in group], db):
+            db_instances.update((o.pk, o) for o in qs.filter(pk__in=pks))
+        missing = [i.pk for i in group if i.pk not in db_instances]
+        if missing:
+            raise model.DoesNotExist(
+                '{} matching pks {} do not exist'.format(
+                    model._meta.object_name, missing
+                )
+            )
+
+        for i in group:
+            db_instance = db_instances[i.pk]
+            non_loaded_fields = db_instance.get_deferred_fields()
+            for f in model._meta.concrete_fields:
+                if f.attname in non_loaded_fields:
+                    continue
+                setattr(i, f.attname, getattr(db_instance, f.attname))
+                if f.is_relation and not f.remote_field.parent_link:
+                    _clear_stale_relation(f, i)
+            i._state.db = db_instance._state.db
+            i._abscrete_take_snapshot(
+                [f.attname for f in model._meta.concrete_fields
+                 if f.attname not in non_loaded_fields]
+            )
+            # The cached parents are copies of the instance, so they have to
+            # be built again
+            _clear_parent_caches(i)
+
+
+def get_summary(obj):
+    """
+    :return: the summary of obj, i.e. the values of its summary fields as
+    JSON-compatible values, by field name
+    """
+    from abscrete.serializers import get_encoder
+    summary = {}
+    for name in obj._abscrete.get_summary_fields():
+        field = obj._meta.get_field(name)
+        summary[name] = get_encoder(field, lossless=True)(
+            getattr(obj, field.attname)
+        )
+    return summary
+
+
+def refresh_summaries(model, pks, using=None, batch_size=500):
+    """
+    Compute again the summaries of the instances of model matching pks, with a
+    single query per concrete model and a single UPDATE per batch of
+    instances
+
+    :param model: any model of a hierarchy whose root has a summary field
+    """
+    from abscrete.serializers import get_encoder
+    abscrete = model._abscrete
+    root = model if abscrete.type == AbscreteType.ROOT else abscrete.branch.root
+    summary_field = root._meta.get_field(abscrete.summary_field_name)
+    root_qs = root._base_manager.using(using)
+
+    pks_by_model = defaultdict(list)
+    for pk, branch in root_qs.filter(pk__in=pks).values_list(
+            'pk', abscrete.field_name):
+        pks_by_model[abscrete.tree.get_model(branch)].append(pk)
+
+    for concrete_model, model_pks in pks_by_model.items():
+        fields = [concrete_model._meta.get_field(name)
+                  for name in concrete_model._abscrete.get_summary_fields()]
+        encoders = [get_encoder(f, lossless=True) for f in fields]
+        rows = iter(concrete_model._base_manager.using(using).filter(
+            pk__in=model_pks
+        ).values_list('pk', *[f.attname for f in fields]))
+
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            whens = [
+                models.When(pk=values[0], then=models.Value(
+                    summary_field.get_prep_value({
+                        f.name: encoder(v)
+                        for f, encoder, v in zip(fields, encoders, values[1:])
+                    })
+                ))
+                for values in batch
+            ]
+            root_qs.filter(pk__in=[values[0] for values in batch]).update(**{
+                summary_field.name: models.Case(
+                    *whens, output_field=models.TextField()
+                )
+            })
+
+
+def _convert(source, pks, target, new_fields, using):
+    """
+    Turn the instances of the leaf model source matching pks into instances of
+    the leaf model target : the rows of the tables that source and target
+    share are kept (and updated with the new abscrete field value), the rows
+    of the tables that are specific to source are deleted and rows are
+    inserted in the tables that are specific to target. This function must be
+    called within a transaction.
+
+    :param new_fields: values of the fields of target to set on all the
+    instances (the fields of the inserted tables that are not provided get
+    their default value)
+    """
+    source_chain = source._abscrete.branch.down + [source]
+    target_chain = target._abscrete.branch.down + [target]
+
+    if (target._abscrete.type != AbscreteType.LEAF or
+            target_chain[0] is not source_chain[0]):
+        raise TypeError(
+            'Can not convert {} instances to {}, which is not a leaf of the '
+            'same root'.format(source.__name__, target.__name__)
+        )
+
+    fields = [target._meta.get_field(name) for name in new_fields]
+    common = 0
+    while (common < min(len(source_chain), len(target_chain)) and
+           source_chain[common] is target_chain[common]):
+        common += 1
+    removed, added = source_chain[common:], target_chain[common:]
+
+    root = target_chain[0]
+    updates = defaultdict(dict)
+    updates[root][target._abscrete.field_name] = target._abscrete.field_value
+    updates[root].update(root._abscrete.get_modified_values())
+
+    if target._abscrete.single_table:
+        # Everything lies in the root table, where the fields specific to the
+        # previous branch are reset
+        for m in removed:
+            for name in m._abscrete.single_table_fields:
+                updates[root][name] = None
+        for f in fields:
+            updates[root][f.name] = new_fields[f.name]
+    else:
+        for m in reversed(removed):
+            collector = Collector(using=using)
+            collector.collect(m._base_manager.using(using).filter(pk__in=pks),
+                              keep_parents=True)
+            collector.delete()
+
+        objs = []
+        for pk in pks:
+            obj = target(**{f.attname: new_fields[f.name] for f in fields})
+            for m in target_chain:
+                setattr(obj, m._meta.pk.attname, pk)
+            objs.append(obj)
+        for m in added:
+            m._base_manager.using(using)._insert(
+                objs, fields=m._meta.local_concrete_fields, using=using
+            )
+
+        for f in fields:
+            model = f.model._meta.concrete_model
+            if model not in added:
+                updates[model][f.name] = new_fields[f.name]
+
+    for model, values in updates.items():
+        model._base_manager.using(using).filter(pk__in=pks).update(**values)
+
+    if root._abscrete.summary is not None:
+        refresh_summaries(root, pks, using)
+
+    from abscrete import cache
+    cache.invalidate(root, using)
+
+
+def abscrete_concrete_fields(model):
+    """
+    :return: the concrete fields that are relevant to model, which, in
+    single-table mode, excludes the fields declared by the models of the
+    other branches
+    """
+    if not model._abscrete.single_table:
+        return model._meta.concrete_fields
+
+    own_fields = set()
+    for m in [model] + list(model._abscrete.branch):
+        own_fields.update(m._abscrete.single_table_fields)
+    other_fields = set()
+    for m in model._abscrete.tree._by_str.values():
+        if m._meta.concrete_model is model._meta.concrete_model:
+            other_fields.update(m._abscrete.single_table_fields)
+
+    return [f for f in model._meta.concrete_fields
+            if f.name in own_fields or f.name not in other_fields]
+
+
+def abscrete_required_fields(model):
+    """
+    :return: the names of the fields that, in single-table mode, may not be
+    blank for the instances of model, although they are blank in the root
+    table
+    """
+    if not model._abscrete.single_table:
+        return []
+    return [name for m in model._abscrete.branch.down + [model]
+            for name in m._abscrete.single_table_required_fields]
+
+
+def get_branch_lookup(model, start=None):
+    """
+    :param start: the model the lookup starts from (by default, the root),
+    which must be model or one of its parents
+    :return: the lookup that goes from start down to the table of model,
+    through the links to the parent tables
+    """
+    chain = model._abscrete.branch.down + [model]
+    if start is not None:
+        chain = chain[chain.index(start):]
+    return LOOKUP_SEP.join(
+        child._meta.parents[parent].related_query_name()
+        for parent, child in zip(chain, chain[1:])
+    )
+
+
+def get_sort_expression(model, name):
+    """
+    Build the expression of a sort field of the root (see
+    abscrete_sort_fields) for a queryset of model : for each leaf below
+    model, the field declared for the leaf or for its closest parent, the
+    fields of the models below model being reached by LEFT OUTER JOINs, and
+    all of them being merged by COALESCE (since only the row of a single
+    branch is found for each instance)
+
+    :return: the expression, or None if name is not a sort field
+    """
+    abscrete = model._abscrete
+    if name not in abscrete.sort_fields:
+        return None
+
+    fields_by_model = abscrete.sort_fields[name]
+    columns = []
+    for leaf in abscrete.tree.get_leaves(model):
+        chain = leaf._abscrete.branch.down + [leaf]
+        declaring = [m for m in chain
+                     if m._abscrete.model_name in fields_by_model]
+        if not declaring:
+            raise TypeError('Sort field {} is not declared for {}'.format(
+                name, leaf.__name__
+            ))
+        target = declaring[-1]
+        column = (target, fields_by_model[target._abscrete.model_name])
+        if column not in columns:
+            columns.append(column)
+
+    # The deepest fields come first, since the rows of the parents of a model
+    # are also found for its instances (the fields of model and of its
+    # parents, which are always found, thus come last)
+    columns.sort(key=lambda c: -len(c[0]._abscrete.branch))
+    expressions = []
+    for target, field_name in columns:
+        if abscrete.single_table or len(target._abscrete.branch) <= len(
+                abscrete.branch):
+            lookup = field_name
+        else:
+            lookup = LOOKUP_SEP.join([get_branch_lookup(target, model),
+                                      field_name])
+        expressions.append(models.F(lookup))
+
+    if len(expressions) == 1:
+        return expressions[0]
+    target, field_name = columns[0]
+    return Coalesce(*expressions,
+                    output_field=target._meta.get_field(field_name))
+
 
 class AbscreteIterable(ModelIterable):
     #: Type of the model
@@ -294,11 +975,65 @@ class AbscreteIterable(ModelIterable):
             # instances of the leaf model, which is the actual concrete model,
             # so there's nothing left to do.
             return super(AbscreteIterable, self).__iter__()
-        else:
-            # If the model is not a leaf, the iterator of ModelIterable returns
-            # instances of an intermediate node's or the root's model, so a
-            # generator with the concrete instance is returned instead
-            return self._abscrete_iterator(super(AbscreteIterable, self).__iter__())
+
+        strategy = self.queryset.abscrete_strategy
+        base_iter = super(AbscreteIterable, self).__iter__()
+        if (strategy == AbscreteQuerySet.RESOLVE_SUMMARY and
+                self.queryset.model._abscrete.summary is not None):
+            # The concrete instances are built from the rows of the queried
+            # model alone
+            return self._summary_iterator(base_iter)
+
+        if strategy == AbscreteQuerySet.RESOLVE_UNION:
+            from abscrete import union
+            if union.is_applicable(self.queryset):
+                # All the concrete instances are retrieved at once, without
+                # querying the instances of the root first
+                return union.union_iterator(self.queryset)
+
+        # If the model is not a leaf, the iterator of ModelIterable returns
+        # instances of an intermediate node's or the root's model, so a
+        # generator with the concrete instance is returned instead
+        return self._abscrete_iterator(base_iter)
+
+    def _summary_iterator(self, base_iter):
+        """
+        Build the concrete instances out of the fields of the queried model
+        and of its summary field : the other fields of the concrete models are
+        deferred.
+        """
+        db = self.queryset.db
+        abscrete = self.queryset.model._abscrete
+        for o in base_iter:
+            concrete_model = abscrete.tree.get_model(o.abscrete_branch)
+            if o.__class__ is concrete_model:
+                yield o
+                continue
+
+            values = {
+                f.attname: getattr(o, f.attname)
+                for f in o._meta.concrete_fields
+                if f.attname in o.__dict__
+            }
+            summary = getattr(o, abscrete.summary_field_name) or {}
+            for name in concrete_model._abscrete.get_summary_fields():
+                field = concrete_model._meta.get_field(name)
+                if name in summary:
+                    values[field.attname] = field.to_python(summary[name])
+
+            attnames = []
+            field_values = []
+            for f in concrete_model._meta.concrete_fields:
+                if f.attname in values:
+                    value = values[f.attname]
+                elif f.is_relation and f.remote_field.parent_link:
+                    value = o.pk
+                else:
+                    continue
+                attnames.append(f.attname)
+                field_values.append(value)
+
+            yield concrete_model.from_db(db, attnames, field_values)
 
     def _abscrete_iterator(self, base_iter):
         """
@@ -311,28 +1046,77 @@ class AbscreteIterable(ModelIterable):
 
         The principle is shamelessly copied from django-polymorphic
         """
-        base_objects = defaultdict(list)
-        ordered_pks = []
-        ordered_results = {}
+        # All the concrete instances are fetched from the same database, so
+        # that the whole listing reflects a consistent state
+        db = self.queryset.abscrete_resolution_db
 
-        while True:
-            try:
-                o = next(base_iter)
-                concrete_model = o._abscrete.tree.get_model(o.abscrete_branch)
-                base_objects[concrete_model].append(o.pk)
-                ordered_pks.append(o.pk)
-            except StopIteration:
-                for o_type, pks in base_objects.items():
-                    for r in o_type.objects.filter(pk__in=pks):
-                        ordered_results[r.pk] = r
-
-                for pk in ordered_pks:
-                    yield ordered_results[pk]
+        for o in abscrete_resolve(list(base_iter), using=db):
+            yield o
+
+
+class AbscreteRawQuerySet(RawQuerySet):
+    """
+    RawQuerySet returning the concrete instances : the rows are read as
+    instances of the queried model, which are resolved by batches with a
+    single query per concrete model. The raw query must select the abscrete
+    field.
+    """
+    #: The number of instances resolved at once
+    batch_size = 100
+
+    def _base_iterator(self):
+        if hasattr(RawQuerySet, 'iterator'):
+            return super(AbscreteRawQuerySet, self).iterator()
+        return super(AbscreteRawQuerySet, self).__iter__()
+
+    def iterator(self):
+        base_iter = self._base_iterator()
+        abscrete = self.model._abscrete
+        if abscrete.type == AbscreteType.LEAF:
+            for o in base_iter:
+                yield o
+            return
 
+        while True:
+            batch = list(itertools.islice(base_iter, self.batch_size))
+            if not batch:
                 return
+            if abscrete.field_name in batch[0].get_deferred_fields():
+                raise InvalidQuery(
+                    'Raw query must include the abscrete field {}'.format(
+                        abscrete.field_name
+                    )
+                )
+            for o in abscrete_resolve(batch):
+                yield o
+
+    def __iter__(self):
+        if hasattr(RawQuerySet, 'iterator'):
+            # Since Django 2.0, the results of iterator are cached
+            return super(AbscreteRawQuerySet, self).__iter__()
+        return self.iterator()
+
+    def using(self, alias):
+        raw = super(AbscreteRawQuerySet, self).using(alias)
+        return AbscreteRawQuerySet(
+            raw.raw_query, model=raw.model, query=raw.query, params=raw.params,
+            translations=raw.translations, using=alias
+        )
 
 
 class AbscreteQuerySet(QuerySet):
+    #: Resolution strategy which first queries the queried model, then makes a
+    # query per concrete model
+    RESOLVE_BY_TYPE = 'by_type'
+    #: Resolution strategy which makes a single UNION ALL query of all the
+    # leaf tables (only for querysets on a root that only filter on the fields
+    # of the root, otherwise RESOLVE_BY_TYPE is used)
+    RESOLVE_UNION = 'union'
+    #: Resolution strategy which builds the concrete instances out of the rows
+    # of the queried model and of the summary field of the root, without any
+    # other query (the fields that are not in the summary are deferred)
+    RESOLVE_SUMMARY = 'summary'
+
     def __init__(self, *args, **kwargs):
         super(AbscreteQuerySet, self).__init__(*args, **kwargs)
 
@@ -345,6 +1129,504 @@ class AbscreteQuerySet(QuerySet):
             (AbscreteIterable,),
             {'type': self.model._abscrete.type}
         )
+        #: Database aliases among which one is picked to retrieve the concrete
+        # instances (by default, the database of the queryset itself)
+        self._abscrete_resolve_using = ()
+        self.abscrete_strategy = self.RESOLVE_BY_TYPE
+        #: Cache parameters, if the results of the queryset are cached
+        self._abscrete_cache = None
+
+    def _clone(self, **kwargs):
+        clone = super(AbscreteQuerySet, self)._clone(**kwargs)
+        clone._abscrete_resolve_using = self._abscrete_resolve_using
+        clone.abscrete_strategy = self.abscrete_strategy
+        clone._abscrete_cache = self._abscrete_cache
+        return clone
+
+    def _fetch_all(self):
+        if self._abscrete_cache is None or self._result_cache is not None:
+            return super(AbscreteQuerySet, self)._fetch_all()
+
+        from abscrete import cache as abscrete_cache
+        timeout, alias = self._abscrete_cache
+        cache = abscrete_cache.get_cache(alias)
+        key = abscrete_cache.get_key(self)
+
+        cached_results = None if key is None else cache.get(key)
+        self._result_cache = cached_results
+        super(AbscreteQuerySet, self)._fetch_all()
+        if key is not None and cached_results is None:
+            cache.set(key, self._result_cache, timeout)
+
+    def cached(self, timeout=DEFAULT_TIMEOUT, cache_alias=None):
+        """
+        Cache the results of the queryset (i.e. the concrete instances), using
+        Django's cache framework. The cached results are invalidated whenever
+        an instance of any model of the same hierarchy is saved or deleted,
+        or when a queryset of the hierarchy is updated. This requires the
+        ABSCRETE_CACHE setting to be set.
+
+        :param timeout: the timeout of the cached results (by default, the
+        one of the cache)
+        :param cache_alias: the cache to use (by default, the one of the
+        ABSCRETE_CACHE setting)
+        :return: a new queryset
+        """
+        clone = self._clone()
+        clone._abscrete_cache = (timeout, cache_alias)
+        return clone
+
+    def update(self, **kwargs):
+        summary = self.model._abscrete.summary
+        pks = None
+        if summary is not None and any(
+                name in kwargs for names in summary.values() for name in names):
+            # The summaries of the updated instances are refreshed afterwards
+            pks = list(self.values_list('pk', flat=True))
+
+        # The modification time lies in the root table, which Django updates
+        # along with the table of the queried model if needed
+        kwargs = dict(self.model._abscrete.get_modified_values(), **kwargs)
+        rows = super(AbscreteQuerySet, self).update(**kwargs)
+        if pks:
+            refresh_summaries(self.model, pks, using=self.db)
+
+        from abscrete import cache
+        cache.invalidate(self.model, self.db)
+        return rows
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        values = self.model._abscrete.get_modified_values()
+        if values:
+            objs = list(objs)
+            for obj in objs:
+                for name, value in values.items():
+                    setattr(obj, name, value)
+        objs = super(AbscreteQuerySet, self).bulk_create(objs, *args,
+                                                         **kwargs)
+
+        # No signal is sent for the created instances
+        from abscrete import cache
+        cache.invalidate(self.model, self.db)
+        return objs
+    bulk_create.alters_data = True
+
+    def order_by(self, *field_names):
+        """
+        Same as QuerySet.order_by, but the virtual sort fields declared by
+        the root (see abscrete_sort_fields) can also be used, e.g.
+        order_by('-published')
+        """
+        ordering = []
+        for o in field_names:
+            expression = None
+            if isinstance(o, six.string_types):
+                expression = get_sort_expression(self.model, o.lstrip('-'))
+            if expression is None:
+                ordering.append(o)
+            elif o.startswith('-'):
+                ordering.append(expression.desc())
+            else:
+                ordering.append(expression.asc())
+        return super(AbscreteQuerySet, self).order_by(*ordering)
+
+    def resolve_with(self, strategy):
+        """
+        :param strategy: the strategy used to retrieve the concrete instances
+        (one of the RESOLVE_* constants)
+        :return: a new queryset
+        """
+        if strategy not in (self.RESOLVE_BY_TYPE, self.RESOLVE_UNION,
+                            self.RESOLVE_SUMMARY):
+            raise ValueError('Unknown resolution strategy {}'.format(strategy))
+
+        clone = self._clone()
+        clone.abscrete_strategy = strategy
+        return clone
+
+    def resolve_using(self, *aliases):
+        """
+        Route the queries retrieving the concrete instances to another
+        database than the one the queryset reads from, e.g. a pool of read
+        replicas. A single alias is picked for each evaluation of the
+        queryset, so that all the instances of a listing come from the same
+        database.
+
+        :param aliases: the database aliases to pick from (calling this
+        function without any alias restores the default behaviour)
+        :return: a new queryset
+        """
+        clone = self._clone()
+        clone._abscrete_resolve_using = tuple(aliases)
+        return clone
+
+    def in_bulk(self, id_list=None, **kwargs):
+        """
+        Same as QuerySet.in_bulk, but when querying a root or a node, only the
+        pks and abscrete fields are read from the table of the queried model,
+        and the concrete instances are then retrieved with a single query per
+        concrete model (and per batch of pks, if the database limits the
+        number of query parameters).
+        """
+        abscrete = self.model._abscrete
+        if (abscrete.type == AbscreteType.LEAF or abscrete.single_table or
+                kwargs.get('field_name', 'pk') != 'pk'):
+            return super(AbscreteQuerySet, self).in_bulk(id_list, **kwargs)
+
+        assert self.query.can_filter(), \
+            "Cannot use 'limit' or 'offset' with in_bulk"
+
+        querysets = [self]
+        if id_list is not None:
+            if not id_list:
+                return {}
+            # Just like QuerySet.in_bulk, by batches that fit within the limit
+            # of parameters of the database
+            querysets = [self.filter(pk__in=pks)
+                         for pks in _split_pks(id_list, self.db)]
+
+        pks_by_model = defaultdict(list)
+        for qs in querysets:
+            for pk, branch in qs.order_by().values_list('pk',
+                                                        abscrete.field_name):
+                pks_by_model[abscrete.tree.get_model(branch)].append(pk)
+
+        db = self.abscrete_resolution_db
+        results = {}
+        for concrete_model, pks in pks_by_model.items():
+            results.update(concrete_model.objects.using(db).in_bulk(pks))
+        return results
+
+    def convert_to(self, target, **new_fields):
+        """
+        Convert all the instances of the queryset into instances of the leaf
+        model target, with a few queries per table and without deleting the
+        rows of the tables shared by their current model and target (see
+        AbscreteModel.convert_to).
+
+        :return: the number of converted instances
+        """
+        self._for_write = True
+        db = self.db
+        abscrete = self.model._abscrete
+        pks_by_model = defaultdict(list)
+        with transaction.atomic(using=db):
+            for pk, branch in self.order_by().values_list(
+                'pk', abscrete.field_name
+            ):
+                pks_by_model[abscrete.tree.get_model(branch)].append(pk)
+
+            for source, pks in pks_by_model.items():
+                _convert(source, pks, target, new_fields, db)
+
+        return sum(len(pks) for pks in pks_by_model.values())
+
+    def raw(self, raw_query, params=None, translations=None, using=None):
+        """
+        Same as QuerySet.raw, but returning the concrete instances (see
+        AbscreteRawQuerySet)
+        """
+        if using is None:
+            using = self.db
+        return AbscreteRawQuerySet(raw_query, model=self.model, params=params,
+                                   translations=translations, using=using)
+
+    def values_typed(self, common=(), per_type=None, type_key='type',
+                     tuples=False):
+        """
+        Same as values (or values_list), but each row is tagged with its type
+        and can hold fields of its concrete model : the common fields are read
+        with the rows of the queried model, and the fields of each type with a
+        single narrow query per concrete model, without instantiating
+        anything.
+
+        :param common: the fields to read for all the rows
+        :param per_type: a dict of the fields to read for the rows of a given
+        leaf or node, e.g. {Movie: ['duration_in_minutes']}
+        :param type_key: the key under which the type (the value of the
+        abscrete field) is output in the dicts
+        :param tuples: output (concrete model, common values...,
+        per type values...) tuples instead of dicts
+        :return: a list of dicts (or tuples), in the order of the queryset
+        """
+        abscrete = self.model._abscrete
+        leaves = abscrete.tree.get_leaves(self.model)
+
+        fields_by_leaf = defaultdict(list)
+        for model, fields in (per_type or {}).items():
+            below = model._abscrete.tree.get_leaves(model)
+            if not set(below) <= set(leaves):
+                raise TypeError('{} is not a model below {}'.format(
+                    model.__name__, self.model.__name__
+                ))
+            for leaf in below:
+                fields_by_leaf[leaf].extend(
+                    f for f in fields if f not in fields_by_leaf[leaf]
+                )
+
+        rows = []
+        pks_by_leaf = defaultdict(list)
+        for row in self.values_list('pk', abscrete.field_name, *common):
+            leaf = abscrete.tree.get_model(row[1])
+            rows.append((leaf, row))
+            if leaf in fields_by_leaf:
+                pks_by_leaf[leaf].append(row[0])
+
+        db = self.abscrete_resolution_db
+        values_by_pk = {}
+        for leaf, pks in pks_by_leaf.items():
+            qs = leaf.objects.using(db).filter(pk__in=pks).values_list(
+                'pk', *fields_by_leaf[leaf]
+            )
+            for values in qs:
+                values_by_pk[(leaf, values[0])] = values[1:]
+
+        results = []
+        for leaf, row in rows:
+            values = values_by_pk.get((leaf, row[0]), ())
+            if tuples:
+                results.append((leaf,) + row[2:] + values)
+            else:
+                data = {type_key: row[1]}
+                data.update(zip(common, row[2:]))
+                data.update(zip(fields_by_leaf.get(leaf, ()), values))
+                results.append(data)
+        return results
+
+    def aggregate_by_type(self, common=None, per_type=None, parallel=False):
+        """
+        Same as aggregate, but by concrete model, so that fields which only
+        exist in some leaves can be aggregated along with the common ones : a
+        single query is made per leaf model, restricted to the instances of
+        the queryset, and the results are rolled up through the nodes (see
+        abscrete.aggregation.aggregate_by_type).
+
+        :param common: a dict of the aggregates to compute for all the
+        leaves, e.g. {'count': Count('pk')}
+        :param per_type: a dict of the aggregates to compute for the leaves
+        below a given model, e.g. {Movie: {'duration':
+        Avg('duration_in_minutes')}}
+        :param parallel: make the queries of the leaves concurrently, each on
+        a connection of its own
+        :return: an OrderedDict of the dicts of aggregates, by model
+        """
+        from abscrete import aggregation
+        return aggregation.aggregate_by_type(self, common, per_type, parallel)
+
+    def changed_since(self, timestamp=None, cursor=None, chunk_size=500):
+        """
+        Stream the concrete instances that were written since a given time
+        (which requires the root to set abscrete_modified), by order of
+        modification, in chunks : each chunk is read with a keyset query on
+        the modification time of the root, then resolved with a query per
+        concrete model.
+
+        :param timestamp: the time from which the instances are returned
+        (all the instances that have a modification time if None)
+        :param cursor: the cursor returned with a chunk, to resume right
+        after it (e.g. in the next run of a synchronisation job)
+        :param chunk_size: the number of instances per chunk
+        :return: a generator of (list of instances, cursor) tuples
+        """
+        abscrete = self.model._abscrete
+        if not abscrete.modified:
+            raise TypeError(
+                'The modification time of the instances of {} is not '
+                'recorded'.format(self.model.__name__)
+            )
+
+        from abscrete.pagination import KeysetPaginator
+        field_name = abscrete.modified_field_name
+        queryset = self.filter(**{field_name + '__isnull': False})
+        if timestamp is not None:
+            queryset = queryset.filter(**{field_name + '__gte': timestamp})
+        paginator = KeysetPaginator(queryset.order_by(field_name), chunk_size,
+                                    check_next=False)
+
+        while True:
+            page = paginator.page(cursor)
+            if page.object_list:
+                cursor = paginator.encode_cursor(page.object_list[-1])
+                yield page.object_list, cursor
+            if not page.has_next:
+                return
+
+    def to_columns(self, numpy=False, chunk_size=2000):
+        """
+        Read the instances as columns rather than as model instances : a
+        batch for the queried model, with the abscrete field, and a batch per
+        leaf model with the fields the queried model lacks, each read with a
+        single projected query (see abscrete.columns.read_batches).
+
+        :param numpy: turn the columns into numpy arrays (requires numpy)
+        :param chunk_size: the number of rows read from the database at once
+        :return: an OrderedDict of abscrete.columns.ColumnBatch, by model
+        """
+        from abscrete import columns
+        batches = columns.read_batches(self, chunk_size)
+        return columns.to_numpy(batches) if numpy else batches
+
+    def to_arrow(self, chunk_size=2000):
+        """
+        Same as to_columns, but as Arrow record batches (requires pyarrow)
+
+        :return: an OrderedDict of pyarrow.RecordBatch, by model
+        """
+        from abscrete import columns
+        return columns.to_arrow(columns.read_batches(self, chunk_size))
+
+    def lock_branch(self, nowait=False, skip_locked=False):
+        """
+        Lock the rows of the instances of the queryset in all the tables of
+        their branch, always from the root down to the leaf, so that workers
+        locking the same instances can not deadlock : a statement locks the
+        rows of the root, then a statement per node and per leaf model locks
+        the rows of its table (the statements of the leaves also retrieve the
+        concrete instances). This must be called within a transaction.
+
+        :param nowait: raise an error instead of waiting for rows locked by
+        another transaction
+        :param skip_locked: skip the instances whose rows are locked by
+        another transaction
+        :return: the list of the locked concrete instances, in the order of
+        the queryset if it is a queryset on a root, by pk otherwise
+        """
+        abscrete = self.model._abscrete
+        root = (self.model if abscrete.type == AbscreteType.ROOT
+                else abscrete.branch.root)
+        lock = {'nowait': nowait, 'skip_locked': skip_locked}
+        db = self.db
+
+        if self.model is root:
+            roots = self.unresolved()
+        else:
+            query = self.query
+            pks = self.values('pk')
+            if not (query.low_mark or query.high_mark is not None):
+                pks = pks.order_by()
+            roots = root._base_manager.using(db).filter(
+                pk__in=pks
+            ).order_by('pk')
+        roots = roots.select_for_update(**lock)
+
+        if abscrete.single_table:
+            # All the rows lie in the root table
+            return abscrete_resolve(list(roots))
+
+        rows = list(roots.values_list('pk', abscrete.field_name))
+        pks_by_leaf = OrderedDict()
+        for pk, branch in rows:
+            pks_by_leaf.setdefault(abscrete.tree.get_model(branch), []).append(pk)
+
+        # The tables of the nodes, level by level, then those of the leaves
+        locked = set(pk for pk, _ in rows)
+        depth = 1
+        while True:
+            pks_by_node = OrderedDict()
+            for leaf, pks in pks_by_leaf.items():
+                chain = leaf._abscrete.branch.down + [leaf]
+                if depth < len(chain) - 1:
+                    pks_by_node.setdefault(chain[depth], []).extend(pks)
+            if not pks_by_node:
+                break
+            for node, pks in pks_by_node.items():
+                node_locked = node._base_manager.using(db).filter(
+                    pk__in=pks
+                ).select_for_update(**lock).values_list('pk', flat=True)
+                locked.difference_update(set(pks) - set(node_locked))
+            depth += 1
+
+        results = {}
+        for leaf, pks in pks_by_leaf.items():
+            pks = [pk for pk in pks if pk in locked]
+            if not pks:
+                continue
+            qs = leaf._base_manager.using(db).filter(
+                pk__in=pks
+            ).select_for_update(**lock)
+            for obj in qs:
+                results[obj.pk] = obj
+
+        return [results[pk] for pk, _ in rows if pk in results]
+
+    def unresolved(self):
+        """
+        :return: a new queryset returning the instances of the queried model
+        itself, without retrieving the concrete instances
+        """
+        clone = self._clone()
+        clone._iterable_class = ModelIterable
+        return clone
+
+    def explain_resolution(self, explain=True):
+        """
+        Describe the queries that evaluating the queryset runs, without
+        instantiating anything : the query of the queried model (or the single
+        UNION ALL query, see RESOLVE_UNION), then a query per concrete model.
+        To know which concrete models are queried, the pks and abscrete fields
+        of the matching rows are read.
+
+        :param explain: whether to add the plan of the database to each query
+        (requires Django >= 2.1)
+        :return: a list of ResolutionQuery
+        """
+        abscrete = self.model._abscrete
+        base = self.unresolved()
+        if self.abscrete_strategy == self.RESOLVE_UNION:
+            from abscrete import union
+            if union.is_applicable(self):
+                base = union.get_union(self)
+
+        try:
+            queries = [_get_resolution_query(base, explain=explain)]
+        except EmptyResultSet:
+            return []
+        if (base.model is not self.model or abscrete.single_table or
+                abscrete.type == AbscreteType.LEAF or
+                (self.abscrete_strategy == self.RESOLVE_SUMMARY and
+                 abscrete.summary is not None)):
+            return queries
+
+        pks_by_model = OrderedDict()
+        for pk, branch in base.values_list('pk', abscrete.field_name):
+            concrete_model = abscrete.tree.get_model(branch)
+            if concrete_model is not self.model:
+                pks_by_model.setdefault(concrete_model, []).append(pk)
+
+        db = self.abscrete_resolution_db
+        for concrete_model, pks in pks_by_model.items():
+            qs = concrete_model.objects.using(db).filter(pk__in=pks)
+            queries.append(_get_resolution_query(qs, len(pks), explain))
+        return queries
+
+    @property
+    def abscrete_resolution_db(self):
+        """
+        :return: the database alias from which the concrete instances should
+        be retrieved
+        """
+        if self._abscrete_resolve_using:
+            return random.choice(self._abscrete_resolve_using)
+
+        return self.db
+
+
+class AbscreteManager(models.Manager.from_queryset(AbscreteQuerySet)):
+    def get_queryset(self):
+        qs = super(AbscreteManager, self).get_queryset()
+
+        abscrete = self.model._abscrete
+        if abscrete.single_table and abscrete.type != AbscreteType.ROOT:
+            # All the models share the same table, so the instances of the
+            # other branches have to be filtered out
+            path = abscrete.branch.path_from_root(self.model)
+            qs = qs.filter(
+                models.Q(**{abscrete.field_name: path}) |
+                models.Q(**{abscrete.field_name + '__startswith': path + '.'})
+            )
+        return qs
+
 
 def split_on(string, char, max):
     """
@@ -363,7 +1645,185 @@ class AbscreteModel(six.with_metaclass(AbscreteModelBase, models.Model)):
     class Meta:
         abstract = True
 
-    objects = AbscreteQuerySet.as_manager()
+    objects = AbscreteManager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(AbscreteModel, cls).from_db(db, field_names, values)
+        instance._abscrete_take_snapshot()
+        return instance
+
+    def _abscrete_take_snapshot(self, attnames=None):
+        """
+        Record the current values of the fields, in order to detect the fields
+        that change afterwards (only if changes are tracked)
+
+        :param attnames: the fields to record (by default, all the loaded
+        fields)
+        """
+        if not self._abscrete.track_changes:
+            return
+
+        if attnames is None or not hasattr(self, '_abscrete_snapshot'):
+            self._abscrete_snapshot = {}
+        if attnames is None:
+            attnames = [f.attname for f in self._meta.concrete_fields]
+        for attname in attnames:
+            if attname in self.__dict__:
+                self._abscrete_snapshot[attname] = self.__dict__[attname]
+
+    @property
+    def abscrete_changed_fields(self):
+        """
+        :return: the names of the fields that changed since the instance was
+        loaded or saved, grouped by the model whose table holds them (in the
+        order of the branch, from the root down), or None if changes are not
+        tracked or the instance has not been saved yet
+        """
+        snapshot = getattr(self, '_abscrete_snapshot', None)
+        if snapshot is None or self._state.adding:
+            return None
+
+        changed = OrderedDict()
+        for f in self._meta.concrete_fields:
+            if f.attname not in self.__dict__:
+                # Deferred field that has not been loaded nor set
+                continue
+            if (f.attname not in snapshot or
+                    snapshot[f.attname] != self.__dict__[f.attname]):
+                model = f.model._meta.concrete_model
+                changed.setdefault(model, []).append(f.name)
+
+        return OrderedDict(
+            (m, changed[m])
+            for m in sorted(changed, key=lambda m: len(m._abscrete.branch))
+        )
+
+    def save(self, *args, **kwargs):
+        """
+        If changes are tracked, saving an instance that was loaded from the
+        database only writes the fields that changed since, which skips the
+        tables of the branch where nothing changed (if nothing changed at all,
+        nothing is written and no signal is sent, just like with an empty
+        update_fields). If the row was deleted since, the instance is saved
+        again completely, which inserts it back (and sends the pre_save and
+        post_save signals a second time).
+        """
+        abscrete = self._abscrete
+        if (abscrete.summary is not None and
+                abscrete.type == AbscreteType.LEAF):
+            # Only a concrete instance knows all the fields of its summary
+            summary_name = abscrete.summary_field_name
+            setattr(self, summary_name, get_summary(self))
+            update_fields = kwargs.get('update_fields')
+            if (update_fields is not None and
+                    summary_name not in update_fields and
+                    set(update_fields) & set(abscrete.get_summary_fields())):
+                kwargs['update_fields'] = list(update_fields) + [summary_name]
+
+        changed = self.abscrete_changed_fields
+        tracked_fields = None
+        if (changed is not None and kwargs.get('update_fields') is None and
+                not kwargs.get('force_insert') and not args):
+            update_fields = [
+                name for names in changed.values() for name in names
+            ]
+            # Changing the primary key requires a complete save
+            if not any(self._meta.get_field(name).primary_key
+                       for name in update_fields):
+                kwargs['update_fields'] = tracked_fields = update_fields
+
+        update_fields = kwargs.get('update_fields')
+        if abscrete.modified and (update_fields is None or update_fields):
+            # Whatever the tables that are written, the root row is updated
+            for name, value in abscrete.get_modified_values().items():
+                setattr(self, name, value)
+                if update_fields is not None and name not in update_fields:
+                    kwargs['update_fields'] = list(update_fields) + [name]
+
+        self._abscrete_row_missing = False if tracked_fields else None
+        try:
+            super(AbscreteModel, self).save(*args, **kwargs)
+        finally:
+            row_missing = self._abscrete_row_missing
+            self._abscrete_row_missing = None
+        if row_missing:
+            # The row was deleted since the instance was loaded : unlike an
+            # explicit update_fields, the tracked fields fall back to a
+            # complete save, which inserts it back
+            del kwargs['update_fields']
+            super(AbscreteModel, self).save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if (abscrete.summary is not None and
+                abscrete.type != AbscreteType.LEAF and self.abscrete_branch):
+            # The summary of the concrete instance is computed again from the
+            # database, if a field it holds was written
+            summary_fields = abscrete.get_summary_fields()
+            if summary_fields and (update_fields is None or
+                                   set(update_fields) & set(summary_fields)):
+                refresh_summaries(self.__class__, [self.pk],
+                                  using=self._state.db)
+
+        if update_fields is None:
+            self._abscrete_take_snapshot()
+        else:
+            self._abscrete_take_snapshot([
+                self._meta.get_field(name).attname for name in update_fields
+            ])
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        """
+        During a save of the tracked fields, the first update that matches no
+        row stops the writes instead of raising a DatabaseError (which would
+        break the transaction), so that save can fall back to a complete save
+        """
+        if getattr(self, '_abscrete_row_missing', None) is None:
+            return super(AbscreteModel, self)._do_update(
+                base_qs, using, pk_val, values, update_fields, forced_update
+            )
+        if self._abscrete_row_missing or not values:
+            return True
+        updated = super(AbscreteModel, self)._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+        self._abscrete_row_missing = not updated
+        return True
+
+    def clean_fields(self, exclude=None):
+        """
+        In single-table mode, only the fields of the branch of the model are
+        validated, and the ones that were declared as not blank are required
+        """
+        if not self._abscrete.single_table:
+            return super(AbscreteModel, self).clean_fields(exclude=exclude)
+
+        own_fields = abscrete_concrete_fields(self.__class__)
+        exclude = list(exclude or []) + [
+            f.name for f in self._meta.concrete_fields if f not in own_fields
+        ]
+        errors = {}
+        try:
+            super(AbscreteModel, self).clean_fields(exclude=exclude)
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+
+        for name in abscrete_required_fields(self.__class__):
+            field = self._meta.get_field(name)
+            if (name not in exclude and name not in errors and
+                    getattr(self, field.attname) in field.empty_values):
+                errors[name] = [ValidationError(field.error_messages['blank'],
+                                                code='blank')]
+        if errors:
+            raise ValidationError(errors)
+
+    def refresh_from_db(self, using=None, fields=None):
+        super(AbscreteModel, self).refresh_from_db(using=using, fields=fields)
+        self._abscrete_take_snapshot(
+            None if fields is None else
+            [self._meta.get_field(name).attname for name in fields]
+        )
 
     @property
     def abscrete_field_name(self):
@@ -386,12 +1846,34 @@ class AbscreteModel(six.with_metaclass(AbscreteModelBase, models.Model)):
     def abscrete_instance(self):
         """
         Warning ! Using this property is costly on the first call (one database
-        hit per intermediate node) and usually not required since the queries
-        made on the parent model already returns the object with its correct
-        type
+        hit per intermediate node, except in single-table mode) and usually
+        not required since the queries made on the parent model already
+        returns the object with its correct type
 
         :return: the concrete instance with the proper type, retrieved using
         the chain of fields that Django automatically adds in OneToOneField
         """
+        if self._abscrete.single_table:
+            return abscrete_resolve([self])[0]
+
         _, model = split_on(self.abscrete_branch, '.', 1)
         return rgetattr(self, model)
+
+    def convert_to(self, target, **new_fields):
+        """
+        Convert the instance into an instance of another leaf model of the
+        same root. Unlike deleting and creating it again, the rows of the
+        tables shared by both models are kept (so are the relations pointing
+        at them), only the rows of the tables that differ are deleted or
+        inserted. Note that no save signal is sent for the new instance.
+
+        :param target: the leaf model to convert the instance to
+        :param new_fields: values for the fields of target
+        :return: the instance of target
+        """
+        source = self._abscrete.tree.get_model(self.abscrete_branch)
+        db = self._state.db or router.db_for_write(source, instance=self)
+        with transaction.atomic(using=db):
+            _convert(source, [self.pk], target, new_fields, db)
+
+        return target._base_manager.using(db).get(pk=self.pk)
@@ -0,0 +1,178 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.utils import six
+
+from abscrete.models import abscrete_resolve
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Same as DjangoJSONEncoder, but keeping the microseconds of the times, so
+    that a cursor matches its row exactly
+    """
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super(CursorEncoder, self).default(o)
+
+
+class KeysetPage(object):
+    def __init__(self, object_list, next_cursor, has_next):
+        #: The concrete instances of the page
+        self.object_list = object_list
+        #: The cursor to pass to the paginator to get the next page
+        self.next_cursor = next_cursor
+        #: Whether there is a next page (None if unknown)
+        self.has_next = has_next
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+
+class KeysetPaginator(object):
+    """
+    Paginator based on the values of the ordering columns of the last object
+    of a page, rather than on an offset : the database can then directly seek
+    to the first row of the next page instead of scanning and discarding all
+    the rows that come before.
+
+    The ordering columns must be fields of the queried model (the primary key
+    is added as a last ordering column if missing, so that the ordering is
+    total). The null values of nullable fields come last, whatever the
+    direction of the ordering. Only the objects of the page are resolved into
+    their concrete instances, with a single query per concrete model.
+    """
+    def __init__(self, queryset, per_page, check_next=True):
+        """
+        :param queryset: an AbscreteQuerySet
+        :param per_page: the number of objects per page
+        :param check_next: if True, an additional row is retrieved with each
+        page to know whether there is a next page; if False, a page is deemed
+        to have a next page when it is full
+        """
+        self.queryset = queryset
+        self.per_page = per_page
+        self.check_next = check_next
+        self.ordering = self._get_ordering(queryset)
+        self.fields = [
+            queryset.model._meta.get_field(name) for name, _ in self.ordering
+        ]
+
+    @staticmethod
+    def _get_ordering(queryset):
+        opts = queryset.model._meta
+        ordering = list(queryset.query.order_by or opts.ordering or [])
+
+        parsed = []
+        for o in ordering:
+            if not isinstance(o, six.string_types):
+                raise ValueError(
+                    'KeysetPaginator only supports ordering by field names, '
+                    'got {}'.format(o)
+                )
+            descending = o.startswith('-')
+            name = o.lstrip('-')
+            if name == 'pk':
+                name = opts.pk.name
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                raise ValueError(
+                    'KeysetPaginator can not order by {} : only fields of {} '
+                    'are supported'.format(o, opts.object_name)
+                )
+            parsed.append((field.name, descending))
+
+        if opts.pk.name not in [name for name, _ in parsed]:
+            parsed.append((opts.pk.name, False))
+
+        return parsed
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, f.attname) for f in self.fields]
+        cursor = json.dumps(values, cls=CursorEncoder).encode('utf-8')
+        return base64.urlsafe_b64encode(cursor).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(
+                base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+            )
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [f.to_python(v) for f, v in zip(self.fields, values)]
+        except (ValueError, TypeError, ValidationError, binascii.Error):
+            raise InvalidCursor('Invalid cursor {}'.format(cursor))
+
+    def _after(self, values):
+        """
+        :return: the condition matching the rows located after values, i.e.
+        (a > x) OR (a = x AND b > y) OR ..., where the null values come after
+        all the others
+        """
+        condition = Q()
+        equal = Q()
+        for (name, descending), field, value in zip(self.ordering,
+                                                    self.fields, values):
+            if value is None:
+                # Only the other null values could come after, and they are
+                # equal
+                equal &= Q(**{name + '__isnull': True})
+                continue
+
+            lookup = '{}__{}'.format(name, 'lt' if descending else 'gt')
+            after = Q(**{lookup: value})
+            if field.null:
+                after |= Q(**{name + '__isnull': True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        return condition
+
+    def _get_order_by(self):
+        order_by = []
+        for (name, descending), field in zip(self.ordering, self.fields):
+            if field.null:
+                expression = F(name)
+                order_by.append(expression.desc(nulls_last=True) if descending
+                                else expression.asc(nulls_last=True))
+            else:
+                order_by.append('-' + name if descending else name)
+        return order_by
+
+    def page(self, cursor=None):
+        """
+        :param cursor: the cursor returned with the previous page, or None to
+        get the first page
+        :return: a KeysetPage
+        """
+        queryset = self.queryset.order_by(*self._get_order_by())
+        if cursor is not None:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+
+        limit = self.per_page + 1 if self.check_next else self.per_page
+        rows = list(queryset.unresolved()[:limit])
+
+        if self.check_next:
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+        else:
+            has_next = len(rows) == self.per_page
+
+        object_list = abscrete_resolve(
+            rows, using=self.queryset.abscrete_resolution_db
+        )
+        next_cursor = self.encode_cursor(rows[-1]) if has_next else None
+        return KeysetPage(object_list, next_cursor, has_next)
@@ -0,0 +1,185 @@
+import json
+import operator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import six
+
+from abscrete.models import abscrete_concrete_fields
+
+
+def _identity(value):
+    return value
+
+
+def _to_str(value):
+    return None if value is None else six.text_type(value)
+
+
+def _to_isoformat(value):
+    return None if value is None else value.isoformat()
+
+
+_default_encoder = DjangoJSONEncoder()
+
+
+def _to_json_default(value):
+    if value is None or isinstance(
+            value, (bool, float) + six.integer_types + six.string_types):
+        return value
+    return _default_encoder.default(value)
+
+
+def _to_datetime(value):
+    # Use the same representation as Django's own JSON serializer
+    return None if value is None else _default_encoder.default(value)
+
+
+#: Encoders turning the values of a field class into something that can be
+# dumped as JSON, checked in order (subclasses must come before their parents)
+FIELD_ENCODERS = [
+    (models.BooleanField, _identity),
+    (models.IntegerField, _identity),
+    (models.FloatField, _identity),
+    (models.CharField, _identity),
+    (models.TextField, _identity),
+    (models.DateTimeField, _to_datetime),
+    (models.DateField, _to_isoformat),
+    (models.TimeField, _to_datetime),
+    (models.DecimalField, _to_str),
+    (models.UUIDField, _to_str),
+    (models.DurationField, _to_json_default),
+]
+
+
+#: Encoders replacing those of FIELD_ENCODERS when the values must be read
+# back exactly (Django's representation of the times drops the microseconds)
+LOSSLESS_ENCODERS = [
+    (models.DateTimeField, _to_isoformat),
+    (models.TimeField, _to_isoformat),
+]
+
+
+def get_encoder(field, lossless=False):
+    """
+    :param lossless: whether the values must be read back exactly
+    :return: the function turning a value of field into something that can be
+    dumped as JSON
+    """
+    if field.is_relation:
+        # Only the related key is serialized, so use the encoder of the field
+        # it points at
+        return get_encoder(field.target_field, lossless)
+
+    encoders = FIELD_ENCODERS
+    if lossless:
+        encoders = LOSSLESS_ENCODERS + FIELD_ENCODERS
+    for field_class, encoder in encoders:
+        if isinstance(field, field_class):
+            return encoder
+
+    return _to_json_default
+
+
+class FieldPlan(object):
+    """
+    Everything required to serialize the instances of a given concrete model,
+    computed once and for all : the names of the output keys, a getter for
+    all the attributes at once and an encoder per attribute.
+    """
+    def __init__(self, model, fields=None, lossless=False):
+        self.model = model
+        self.type = model._abscrete.field_value
+
+        self.fields = []
+        for f in abscrete_concrete_fields(model):
+            if f.primary_key or f.name == model._abscrete.field_name:
+                continue
+            if f.is_relation and f.remote_field.parent_link:
+                # Links to the parent tables all hold the value of the pk
+                continue
+            if fields is not None and f.name not in fields:
+                continue
+            self.fields.append(f)
+
+        self.names = [f.name for f in self.fields]
+        self.encoders = [get_encoder(f, lossless) for f in self.fields]
+
+        attnames = [model._meta.pk.attname] + [f.attname for f in self.fields]
+        getter = operator.attrgetter(*attnames)
+        if len(attnames) == 1:
+            # attrgetter only returns a tuple when given several attributes
+            self.getter = lambda obj: (getter(obj),)
+        else:
+            self.getter = getter
+        self.pk_encoder = get_encoder(model._meta.pk, lossless)
+
+    def to_dict(self, obj, type_key):
+        values = self.getter(obj)
+        data = {type_key: self.type, 'pk': self.pk_encoder(values[0])}
+        for name, encoder, value in zip(self.names, self.encoders, values[1:]):
+            data[name] = encoder(value)
+        return data
+
+
+class AbscreteSerializer(object):
+    """
+    Serializer for the (heterogeneous) results of an AbscreteQuerySet.
+
+    Rather than introspecting the fields of each object, a plan is computed
+    for every concrete model below the queried model when the serializer is
+    built, and the objects are then streamed through it as plain dicts, JSON
+    or JSON Lines. Each object is tagged with its type, which is the value of
+    its abscrete field.
+    """
+    def __init__(self, model, fields=None, type_key='type'):
+        """
+        :param model: the model that will be queried (root, node or leaf)
+        :param fields: if provided, only the fields of that list are
+        serialized (the pk and type are always included)
+        :param type_key: the key under which the type of each object is output
+        """
+        self.type_key = type_key
+        self.plans = {
+            leaf: FieldPlan(leaf, fields)
+            for leaf in model._abscrete.tree.get_leaves(model)
+        }
+
+    def iter_dicts(self, queryset):
+        plans = self.plans
+        type_key = self.type_key
+        for obj in queryset.iterator():
+            yield plans[obj.__class__].to_dict(obj, type_key)
+
+    def iter_json_lines(self, queryset):
+        dumps = json.JSONEncoder(separators=(',', ':')).encode
+        for data in self.iter_dicts(queryset):
+            yield dumps(data) + '\n'
+
+    def iter_json(self, queryset):
+        dumps = json.JSONEncoder(separators=(',', ':')).encode
+        separator = '['
+        for data in self.iter_dicts(queryset):
+            yield separator + dumps(data)
+            separator = ','
+
+        yield '[]' if separator == '[' else ']'
+
+    def serialize(self, queryset, stream=None, json_lines=False):
+        """
+        :param queryset: the queryset to serialize
+        :param stream: if provided, the output is written to that file-like
+        object instead of being returned
+        :param json_lines: output JSON Lines rather than a JSON array
+        :return: the serialized string if no stream was provided
+        """
+        if json_lines:
+            chunks = self.iter_json_lines(queryset)
+        else:
+            chunks = self.iter_json(queryset)
+
+        if stream is None:
+            return ''.join(chunks)
+
+        for chunk in chunks:
+            stream.write(chunk)
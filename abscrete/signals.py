@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+#: Sent each time instances are resolved into their concrete instances, with
+# the number of resolved objects and the list of the queries that were run
+# (as abscrete.models.ResolutionQuery). The queries are only compiled if this
+# signal has receivers.
+resolved = Signal()
@@ -0,0 +1,233 @@
+import threading
+import time
+
+from django.core.exceptions import FieldDoesNotExist, MultipleObjectsReturned
+
+from abscrete import cache as abscrete_cache
+from abscrete.models import abscrete_concrete_fields
+
+
+class SnapshotRecord(object):
+    """
+    Compact, read-only representation of an instance of a leaf model : a
+    subclass with the attributes of the leaf as slots is built for each leaf
+    model.
+    """
+    __slots__ = ()
+    #: The leaf model whose instances are represented
+    model = None
+    #: The name of the primary key attribute
+    pk_attname = None
+
+    def __init__(self, values):
+        for attname, value in zip(self.__slots__, values):
+            object.__setattr__(self, attname, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Snapshot records are read-only')
+
+    @property
+    def pk(self):
+        return getattr(self, self.pk_attname)
+
+    def __eq__(self, other):
+        return (isinstance(other, SnapshotRecord) and
+                self.model is other.model and self.pk == other.pk)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.model, self.pk))
+
+    def __repr__(self):
+        return '<{}Record: {}>'.format(self.model.__name__, self.pk)
+
+
+def _record_class(leaf):
+    fields = abscrete_concrete_fields(leaf)
+    return type(
+        '{}Record'.format(leaf.__name__),
+        (SnapshotRecord,),
+        {'__slots__': tuple(f.attname for f in fields),
+         'model': leaf,
+         'pk_attname': leaf._meta.pk.attname}
+    )
+
+
+class Snapshot(object):
+    """
+    In-memory copy of all the instances below a root (or a node), for small
+    hierarchies that are read far more often than they are written.
+
+    The instances are loaded once with a single narrow query per leaf model,
+    and stored as records indexed by pk and by type. Lookups by pk, by type
+    and on simple equalities are then served without any query. When the
+    ABSCRETE_CACHE setting is set, the snapshot is loaded again as soon as an
+    instance of the hierarchy is written (by any process).
+    """
+    def __init__(self, model, check_interval=0, using=None):
+        """
+        :param model: the root or node whose instances are loaded
+        :param check_interval: the minimum number of seconds between two
+        checks of the version of the hierarchy
+        :param using: the database alias to load the instances from
+        """
+        self.model = model
+        self.check_interval = check_interval
+        self.using = using
+
+        self.leaves = model._abscrete.tree.get_leaves(model)
+        self.record_classes = {leaf: _record_class(leaf) for leaf in self.leaves}
+
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+        self._by_pk = None
+        self._by_type = None
+
+    def _load(self):
+        by_pk = {}
+        by_type = {}
+        for leaf in self.leaves:
+            record_class = self.record_classes[leaf]
+            qs = leaf._base_manager.using(self.using).order_by('pk')
+            abscrete = leaf._abscrete
+            if abscrete.single_table:
+                # All the leaves share the table of the root
+                qs = qs.filter(**{abscrete.field_name: abscrete.field_value})
+            records = [record_class(values)
+                       for values in qs.values_list(*record_class.__slots__)]
+            by_type[leaf] = records
+            by_pk.update((r.pk, r) for r in records)
+
+        # The indexes are replaced at once, so that concurrent readers always
+        # see a consistent state
+        self._by_pk, self._by_type = by_pk, by_type
+
+    def _get_version(self):
+        if not abscrete_cache.is_enabled():
+            return None
+        return abscrete_cache.get_version(self.model)
+
+    def refresh(self):
+        """
+        Load the instances again
+        """
+        with self._lock:
+            self._version = self._get_version()
+            self._checked_at = time.time()
+            self._load()
+
+    def _ensure_fresh(self):
+        now = time.time()
+        if (self._by_pk is not None and
+                now - self._checked_at < self.check_interval):
+            return
+        if self._by_pk is None or self._get_version() != self._version:
+            self.refresh()
+        else:
+            self._checked_at = now
+
+    def all(self):
+        self._ensure_fresh()
+        return [r for leaf in self.leaves for r in self._by_type[leaf]]
+
+    def instance_of(self, *models):
+        """
+        :return: the records of the leaves below any of models
+        """
+        self._ensure_fresh()
+        leaves = set()
+        for m in models:
+            leaves.update(m._abscrete.tree.get_leaves(m))
+        return [r for leaf in self.leaves if leaf in leaves
+                for r in self._by_type[leaf]]
+
+    def filter(self, **filters):
+        """
+        :param filters: equality filters, by field name or attribute name
+        (the records of the leaves that do not have one of the fields never
+        match)
+        :return: the matching records
+        """
+        self._ensure_fresh()
+        records = []
+        for leaf in self.leaves:
+            attnames = self._get_attnames(leaf, filters)
+            if attnames is None:
+                continue
+            records.extend(
+                r for r in self._by_type[leaf]
+                if all(getattr(r, attname) == value
+                       for attname, value in attnames)
+            )
+        return records
+
+    def _get_attnames(self, leaf, filters):
+        """
+        :return: the list of (attribute name, value) of the filters for leaf,
+        or None if leaf lacks one of the fields
+        """
+        record_class = self.record_classes[leaf]
+        attnames = []
+        for name, value in filters.items():
+            if name == 'pk':
+                name = record_class.pk_attname
+            if name not in record_class.__slots__:
+                try:
+                    name = leaf._meta.get_field(name).attname
+                except FieldDoesNotExist:
+                    return None
+                if name not in record_class.__slots__:
+                    return None
+            attnames.append((name, value))
+        return attnames
+
+    def get(self, pk=None, **filters):
+        """
+        :return: the single record with that pk and/or matching filters
+        """
+        if pk is not None and not filters:
+            self._ensure_fresh()
+            try:
+                return self._by_pk[pk]
+            except KeyError:
+                raise self.model.DoesNotExist(
+                    '{} matching pk {} does not exist'.format(
+                        self.model._meta.object_name, pk
+                    )
+                )
+
+        if pk is not None:
+            filters['pk'] = pk
+        records = self.filter(**filters)
+        if not records:
+            raise self.model.DoesNotExist(
+                '{} matching query does not exist'.format(
+                    self.model._meta.object_name
+                )
+            )
+        if len(records) > 1:
+            raise MultipleObjectsReturned(
+                'get() returned more than one {} -- it returned {}'.format(
+                    self.model._meta.object_name, len(records)
+                )
+            )
+        return records[0]
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(model, **kwargs):
+    """
+    :return: the snapshot of model for the current process, which is created
+    the first time (see Snapshot for the keyword arguments)
+    """
+    if model not in _snapshots:
+        with _snapshots_lock:
+            if model not in _snapshots:
+                _snapshots[model] = Snapshot(model, **kwargs)
+    return _snapshots[model]
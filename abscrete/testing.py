@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from abscrete import signals
+
+
+class ResolutionPass(object):
+    def __init__(self, count, queries):
+        #: The number of objects that were resolved
+        self.count = count
+        #: The queries that were run, as ResolutionQuery
+        self.queries = queries
+
+    @property
+    def models(self):
+        """
+        :return: the concrete models that were queried
+        """
+        return [q.model for q in self.queries]
+
+    def __repr__(self):
+        return '<ResolutionPass: {} objects, {} queries>'.format(
+            self.count, len(self.queries)
+        )
+
+
+@contextmanager
+def record_resolutions():
+    """
+    Context manager recording each resolution of instances into their concrete
+    instances (by querysets, abscrete_resolve, the paginator, ...) that
+    happens within it::
+
+        with record_resolutions() as passes:
+            list(Root.objects.all())
+        assert len(passes) == 1
+
+    :return: the list of ResolutionPass, filled as resolutions happen
+    """
+    passes = []
+
+    def receiver(sender, count, queries, **kwargs):
+        passes.append(ResolutionPass(count, queries))
+
+    signals.resolved.connect(receiver, weak=False)
+    try:
+        yield passes
+    finally:
+        signals.resolved.disconnect(receiver)
+
+
+class AbscreteTestMixin(object):
+    """
+    Mixin for django.test.TestCase adding assertions on the queries run to
+    retrieve concrete instances
+    """
+    def assertAbscreteQueries(self, queryset, base=1, per_type=1,
+                              using=DEFAULT_DB_ALIAS):
+        """
+        Evaluate queryset and check that it ran base queries, plus per_type
+        queries per concrete model that had to be resolved (i.e. every
+        concrete model of the results other than the queried model itself),
+        which catches the regressions that turn the resolution into a query
+        per object.
+
+        :param using: the database alias whose queries are counted
+        :return: the results of queryset
+        """
+        with CaptureQueriesContext(connections[using]) as context:
+            results = list(queryset)
+
+        types = set(o.__class__ for o in results) - {queryset.model}
+        expected = base + per_type * len(types)
+        executed = len(context)
+        self.assertEqual(
+            executed, expected,
+            '{} queries executed for {} concrete models, {} expected\n{}'.format(
+                executed, len(types), expected,
+                '\n'.join('{}. {}'.format(i, q['sql']) for i, q in
+                          enumerate(context.captured_queries, start=1))
+            )
+        )
+        return results
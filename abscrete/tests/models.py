@@ -97,6 +97,90 @@ class Leaf2111(Node211):
 class Leaf211(Node21):
     pass
 
+# Test with a whole hierarchy stored in a single table
+
+class SingleTableRoot(AbscreteModel):
+    abscrete_single_table = True
+    field1 = models.IntegerField()
+class SingleTableLeaf1(SingleTableRoot):
+    field11 = models.PositiveIntegerField()
+class SingleTableNode2(SingleTableRoot):
+    field2 = models.CharField(max_length=10)
+class SingleTableLeaf21(SingleTableNode2):
+    field21 = models.TextField()
+class SingleTableLeaf22(SingleTableNode2):
+    pass
+
+# Test with changes tracking
+
+class TrackedRoot(AbscreteModel):
+    abscrete_track_changes = True
+    field1 = models.IntegerField()
+class TrackedNode(TrackedRoot):
+    field2 = models.IntegerField()
+class TrackedLeaf(TrackedNode):
+    field3 = models.IntegerField()
+
+# Test with a summary field
+
+class SummaryRoot(AbscreteModel):
+    abscrete_summary = {
+        'SummaryNode': ['field2'],
+        'SummaryLeaf1': ['field11', 'date11'],
+        'SummaryLeaf2': ['field22', 'time22'],
+    }
+    field1 = models.IntegerField()
+class SummaryNode(SummaryRoot):
+    field2 = models.IntegerField()
+class SummaryLeaf1(SummaryNode):
+    field11 = models.IntegerField()
+    date11 = models.DateField()
+    field12 = models.TextField()
+class SummaryLeaf2(SummaryRoot):
+    field22 = models.CharField(max_length=10)
+    time22 = models.DateTimeField(null=True)
+
+# Test with a sort field
+
+class SortedRoot(AbscreteModel):
+    abscrete_sort_fields = {
+        'published': {
+            'SortedRoot': 'field1',
+            'SortedLeaf1': 'field11',
+            'SortedNode2': 'field2',
+        },
+    }
+    field1 = models.IntegerField()
+class SortedLeaf1(SortedRoot):
+    field11 = models.IntegerField()
+class SortedNode2(SortedRoot):
+    field2 = models.IntegerField()
+class SortedLeaf21(SortedNode2):
+    pass
+class SortedLeaf22(SortedNode2):
+    pass
+class SortedLeaf3(SortedRoot):
+    pass
+
+# Test with automatic dates
+
+class DatedRoot(AbscreteModel):
+    created = models.DateTimeField(auto_now_add=True)
+class DatedLeaf(DatedRoot):
+    updated = models.DateTimeField(auto_now=True)
+
+# Test with the modification time of the instances
+
+class ModifiedRoot(AbscreteModel):
+    abscrete_modified = True
+    field1 = models.IntegerField()
+class ModifiedNode(ModifiedRoot):
+    field2 = models.IntegerField()
+class ModifiedLeaf1(ModifiedNode):
+    field3 = models.IntegerField()
+class ModifiedLeaf2(ModifiedRoot):
+    pass
+
 # Test with one-to-one relations between models
 
 class O2ORelationRoot1(AbscreteModel):
@@ -1,10 +1,40 @@
 from collections import OrderedDict
+import datetime
+import json
+import os
+import shutil
+import tempfile
 
-from django.test import TestCase
+from unittest import skipUnless
+
+from django.apps import apps as django_apps
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.exceptions import (ImproperlyConfigured,
+                                    MultipleObjectsReturned, ValidationError)
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.db.models.signals import post_delete
+from django.db.models.query_utils import InvalidQuery
+from django.db.migrations.state import ProjectState
+from django.test import (TestCase, TransactionTestCase, RequestFactory,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.utils import six, timezone
 
 from model_mommy import mommy
 
-from abscrete.models import (AbscreteMeta, AbscreteType, AbscreteTree)
+from abscrete.admin import AbscreteModelAdmin, AbscreteTypeListFilter
+from abscrete import columns, dump, federation, flat, integrity, union
+from abscrete.models import (AbscreteMeta, AbscreteModel, AbscreteQuerySet,
+                             AbscreteType, AbscreteTree,
+                             abscrete_concrete_fields, refresh_many)
+from abscrete.pagination import InvalidCursor, KeysetPaginator
+from abscrete.serializers import AbscreteSerializer
+from abscrete.snapshot import Snapshot, get_snapshot
+from abscrete.testing import AbscreteTestMixin, record_resolutions
 import abscrete.tests.models as tm
 
 
@@ -192,6 +222,33 @@ class RandomTree(AbscreteTestCase):
         }
 
 
+class SingleTable(AbscreteTestCase):
+    """
+    Those tests feature a hierarchy which is entirely stored in the table of
+    its root.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.roots = [tm.SingleTableRoot]
+        cls.tree = {
+            tm.SingleTableRoot: OrderedDict(
+                [(tm.SingleTableLeaf1, OrderedDict()),
+                 (tm.SingleTableNode2, OrderedDict(
+                     [(tm.SingleTableLeaf21, OrderedDict()),
+                      (tm.SingleTableLeaf22, OrderedDict())]
+                 ))]
+            )
+        }
+        cls.leaves = {
+            tm.SingleTableLeaf1: [tm.SingleTableRoot],
+            tm.SingleTableLeaf21: [tm.SingleTableNode2, tm.SingleTableRoot],
+            tm.SingleTableLeaf22: [tm.SingleTableNode2, tm.SingleTableRoot],
+        }
+        cls.nodes = {
+            tm.SingleTableNode2: [tm.SingleTableRoot]
+        }
+
+
 # Definition of the actual test functions
 
 class AbscreteMetaTest:
@@ -325,6 +382,9 @@ class AbscreteMetaSeveralIntermediateNodesTest(AbscreteMetaTest, SeveralIntermed
 class AbscreteMetaRandomTreeTest(AbscreteMetaTest, RandomTree):
     pass
 
+class AbscreteMetaSingleTableTest(AbscreteMetaTest, SingleTable):
+    pass
+
 class AbscreteModelTestPlain(AbscreteModelTest, OnePlainRoot):
     pass
 class AbscreteModelTestSeveralPlain(AbscreteModelTest, SeveralPlainRoots):
@@ -346,6 +406,8 @@ class AbscreteQuerySetTestSeveralIntermediateNodes(AbstractQuerySetTest, Several
     pass
 class AbscreteQuerySetTestRandomTree(AbstractQuerySetTest, RandomTree):
     pass
+class AbscreteQuerySetTestSingleTable(AbstractQuerySetTest, SingleTable):
+    pass
 
 
 class OneToOneRelationTest(TestCase):
@@ -469,3 +531,1773 @@ class M2MRelationTest(TestCase):
                 self.assertNotEqual(related.__class__, tm.M2MRelationRoot1)
                 self.assertIn(related.__class__,
                               [tm.M2MRelationLeaf11, tm.M2MRelationLeaf12])
+
+
+def make_using(db, kls, **attrs):
+    instance = mommy.prepare(kls, **attrs)
+    instance.save(using=db)
+    return instance
+
+
+class MultipleDatabasesTest(TestCase):
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.default_instances = [
+            mommy.make(tm.PlainLeaf1, field1=1),
+            mommy.make(tm.PlainLeaf2, field1=1),
+        ]
+        # Instances that only exist on the replica, with pks that collide
+        # with the ones of the default database
+        cls.replica_instances = [
+            make_using('replica', tm.PlainLeaf3, field1=2),
+            make_using('replica', tm.PlainLeaf1, field1=2),
+        ]
+
+    def test_resolution_follows_using(self):
+        qs = tm.PlainRoot.objects.using('replica').all()
+        self.assertSequenceEqual(self.replica_instances, qs)
+        for o in qs:
+            self.assertEqual(o._state.db, 'replica')
+
+    def test_resolve_using(self):
+        mommy.make(tm.PlainLeaf1, pk=100, field1=3, field11=1)
+        make_using('replica', tm.PlainLeaf1, pk=100, field1=3, field11=2)
+
+        qs = tm.PlainRoot.objects.filter(pk=100).resolve_using('replica')
+        with self.assertNumQueries(1, using='default'), \
+                self.assertNumQueries(1, using='replica'):
+            instances = list(qs)
+
+        self.assertEqual(len(instances), 1)
+        self.assertEqual(instances[0]._state.db, 'replica')
+        self.assertEqual(instances[0].field11, 2)
+
+    def test_resolve_using_is_cloned(self):
+        qs = tm.PlainRoot.objects.resolve_using('replica')
+        self.assertEqual(qs.filter(field1=1)._abscrete_resolve_using,
+                         ('replica',))
+        self.assertEqual(qs.filter(field1=1).abscrete_resolution_db, 'replica')
+        self.assertEqual(qs.resolve_using().abscrete_resolution_db, 'default')
+
+    def test_convert_to(self):
+        default = mommy.make(tm.LeafWithIntermediate1)
+        replica = make_using('replica', tm.LeafWithIntermediate1,
+                             pk=default.pk)
+
+        converted = tm.RootWithOneNode.objects.using('replica').filter(
+            pk=replica.pk
+        ).convert_to(tm.LeafWithIntermediate3)
+        self.assertEqual(converted, 1)
+        self.assertEqual(
+            tm.RootWithOneNode.objects.using('replica').get(
+                pk=replica.pk
+            ).__class__,
+            tm.LeafWithIntermediate3
+        )
+        self.assertEqual(tm.RootWithOneNode.objects.get(pk=default.pk),
+                         default)
+
+
+class SerializerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [
+            mommy.make(tm.PlainLeaf1),
+            mommy.make(tm.PlainLeaf2),
+            mommy.make(tm.PlainLeaf3),
+            mommy.make(tm.PlainLeaf1),
+        ]
+
+    def _expected(self, o):
+        data = {'type': o.abscrete_branch, 'pk': o.pk, 'field1': o.field1}
+        for f in ['field11', 'field12', 'field13']:
+            if hasattr(o, f):
+                data[f] = getattr(o, f)
+        return data
+
+    def test_plans(self):
+        serializer = AbscreteSerializer(tm.PlainRoot)
+        self.assertEqual(set(serializer.plans),
+                         {tm.PlainLeaf1, tm.PlainLeaf2, tm.PlainLeaf3})
+        self.assertEqual(serializer.plans[tm.PlainLeaf1].names,
+                         ['field1', 'field11'])
+
+        serializer = AbscreteSerializer(tm.RootWithOneNode)
+        self.assertEqual(serializer.plans[tm.LeafWithIntermediate1].names,
+                         ['field2'])
+
+    def test_json(self):
+        serializer = AbscreteSerializer(tm.PlainRoot)
+        with self.assertNumQueries(4):
+            output = serializer.serialize(tm.PlainRoot.objects.all())
+        self.assertEqual(json.loads(output),
+                         [self._expected(o) for o in self.instances])
+
+        self.assertEqual(
+            json.loads(serializer.serialize(tm.PlainRoot.objects.none())),
+            []
+        )
+
+    def test_json_lines(self):
+        serializer = AbscreteSerializer(tm.PlainRoot, fields=['field1'])
+        stream = six.StringIO()
+        serializer.serialize(tm.PlainRoot.objects.all(), stream,
+                             json_lines=True)
+        self.assertEqual(
+            [json.loads(l) for l in stream.getvalue().splitlines()],
+            [{'type': o.abscrete_branch, 'pk': o.pk, 'field1': o.field1}
+             for o in self.instances]
+        )
+
+
+class AdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.instances = [
+            mommy.make(tm.LeafWithIntermediate1),
+            mommy.make(tm.LeafWithIntermediate2),
+            mommy.make(tm.LeafWithIntermediate1),
+        ]
+
+    def setUp(self):
+        self.site = admin.AdminSite(name='abscrete_test')
+        self.site.register(tm.RootWithOneNode, AbscreteModelAdmin,
+                           list_filter=(AbscreteTypeListFilter,))
+        self.site.register(tm.LeafWithIntermediate1)
+        self.model_admin = self.site._registry[tm.RootWithOneNode]
+
+        self.request = RequestFactory().get('/')
+        self.request.user = self.superuser
+
+    def test_list_filter(self):
+        list_filter = AbscreteTypeListFilter(
+            self.request, {}, tm.RootWithOneNode, self.model_admin
+        )
+        self.assertEqual(
+            [value for value, _ in list_filter.lookup_choices],
+            [l._abscrete.field_value for l in [tm.LeafWithIntermediate1,
+                                               tm.LeafWithIntermediate2,
+                                               tm.LeafWithIntermediate3,
+                                               tm.LeafWithIntermediate4]]
+        )
+
+        value = tm.LeafWithIntermediate1._abscrete.field_value
+        list_filter = AbscreteTypeListFilter(
+            self.request, {'abscrete_type': value}, tm.RootWithOneNode,
+            self.model_admin
+        )
+        qs = list_filter.queryset(self.request,
+                                  tm.RootWithOneNode.objects.all())
+        self.assertNotIn('JOIN', str(qs.query))
+        self.assertSequenceEqual([self.instances[0], self.instances[2]], qs)
+
+    @skipUnless(hasattr(admin.ModelAdmin, 'get_changelist_instance'),
+                'ModelAdmin.get_changelist_instance is required')
+    def test_changelist(self):
+        self.model_admin.list_display = ('field2',)
+        changelist = self.model_admin.get_changelist_instance(self.request)
+        # Both counts of the changelist, then the objects of the page
+        with self.assertNumQueries(3):
+            changelist.get_results(self.request)
+            result_list = list(changelist.result_list)
+        for o in result_list:
+            self.assertEqual(o.__class__, tm.RootWithOneNode)
+
+        self.model_admin.list_display = ('field2', '__str__')
+        self.model_admin.abscrete_list_display = ('__str__',)
+        changelist = self.model_admin.get_changelist_instance(self.request)
+        # ... with one additional query per concrete model
+        with self.assertNumQueries(5):
+            changelist.get_results(self.request)
+        self.assertEqual(set(changelist.result_list), set(self.instances))
+        self.assertEqual(
+            [o.__class__ for o in changelist.result_list],
+            [o.__class__ for o in sorted(self.instances, key=lambda o: -o.pk)]
+        )
+
+    def test_concrete_admin(self):
+        with self.assertNumQueries(1):
+            self.assertIs(
+                self.model_admin.get_concrete_admin(self.request,
+                                                    self.instances[0].pk),
+                self.site._registry[tm.LeafWithIntermediate1]
+            )
+        self.assertIsNone(
+            self.model_admin.get_concrete_admin(self.request,
+                                                self.instances[1].pk)
+        )
+        self.assertIsNone(self.model_admin.get_concrete_admin(self.request, 0))
+        self.assertIsNone(
+            self.model_admin.get_concrete_admin(self.request, 'invalid')
+        )
+
+    def test_single_table_form(self):
+        self.site.register(tm.SingleTableLeaf21, AbscreteModelAdmin)
+        model_admin = self.site._registry[tm.SingleTableLeaf21]
+        form_class = model_admin.get_form(self.request)
+        self.assertEqual(
+            [(name, f.required) for name, f in form_class.base_fields.items()],
+            [('field1', True), ('field2', True), ('field21', True)]
+        )
+
+        form = form_class({'field1': 2, 'field2': 'x', 'field21': 't'})
+        self.assertTrue(form.is_valid(), form.errors)
+        form = form_class({'field1': 2, 'field2': 'x'})
+        self.assertEqual(list(form.errors), ['field21'])
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = []
+        for i in range(7):
+            for kls in [tm.PlainLeaf1, tm.PlainLeaf2, tm.PlainLeaf3]:
+                cls.instances.append(mommy.make(kls, field1=i % 3))
+
+    def _all_pages(self, paginator):
+        pages = [paginator.page()]
+        while pages[-1].has_next:
+            pages.append(paginator.page(pages[-1].next_cursor))
+        return pages
+
+    def test_pages(self):
+        paginator = KeysetPaginator(
+            tm.PlainRoot.objects.order_by('-field1'), per_page=4
+        )
+        self.assertEqual(paginator.ordering, [('field1', True), ('id', False)])
+
+        pages = self._all_pages(paginator)
+        self.assertEqual([len(p) for p in pages], [4, 4, 4, 4, 4, 1])
+        self.assertSequenceEqual(
+            [o for p in pages for o in p],
+            sorted(self.instances, key=lambda o: (-o.field1, o.pk))
+        )
+
+    def test_page_queries(self):
+        paginator = KeysetPaginator(tm.PlainRoot.objects.all(), per_page=2)
+        first_page = paginator.page()
+        # One query for the rows of the page, then one per concrete model
+        with self.assertNumQueries(3):
+            page = paginator.page(first_page.next_cursor)
+        self.assertSequenceEqual(self.instances[2:4], page.object_list)
+        self.assertTrue(page.has_next)
+
+    def test_without_check_next(self):
+        paginator = KeysetPaginator(tm.PlainRoot.objects.all(), per_page=7,
+                                    check_next=False)
+        pages = self._all_pages(paginator)
+        self.assertEqual([len(p) for p in pages], [7, 7, 7, 0])
+        self.assertIsNone(pages[-1].next_cursor)
+
+    def test_nullable(self):
+        instances = [
+            mommy.make(tm.SingleTableLeaf1, field1=1, field11=2),
+            mommy.make(tm.SingleTableLeaf22, field1=1, field2='1'),
+            mommy.make(tm.SingleTableLeaf1, field1=1, field11=1),
+            mommy.make(tm.SingleTableLeaf21, field1=1, field2='2'),
+            mommy.make(tm.SingleTableLeaf1, field1=1, field11=2),
+        ]
+        # The null values come last, in both directions
+        for ordering, expected in [('field11', [2, 0, 4, 1, 3]),
+                                   ('-field11', [0, 4, 2, 1, 3])]:
+            paginator = KeysetPaginator(
+                tm.SingleTableRoot.objects.order_by(ordering), per_page=2
+            )
+            self.assertEqual([o for p in self._all_pages(paginator) for o in p],
+                             [instances[i] for i in expected])
+
+    def test_invalid(self):
+        paginator = KeysetPaginator(tm.PlainRoot.objects.all(), per_page=2)
+        with self.assertRaises(InvalidCursor):
+            paginator.page('invalid')
+
+        with self.assertRaises(ValueError):
+            KeysetPaginator(
+                tm.PlainRoot.objects.order_by('plainleaf1__field11'),
+                per_page=2
+            )
+
+
+class SingleTableTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.leaf1 = tm.SingleTableLeaf1.objects.create(field1=1, field11=11)
+        cls.leaf21 = tm.SingleTableLeaf21.objects.create(
+            field1=2, field2='2', field21='21'
+        )
+        cls.leaf22 = tm.SingleTableLeaf22.objects.create(field1=3, field2='3')
+
+    def test_models(self):
+        for m in [tm.SingleTableLeaf1, tm.SingleTableNode2,
+                  tm.SingleTableLeaf21, tm.SingleTableLeaf22]:
+            self.assertTrue(m._meta.proxy)
+            self.assertIs(m._meta.concrete_model, tm.SingleTableRoot)
+
+        self.assertEqual(
+            set(f.name for f in tm.SingleTableRoot._meta.concrete_fields),
+            {'id', 'field1', 'abscrete_type_singletableroot',
+             'field11', 'field2', 'field21'}
+        )
+        self.assertEqual(
+            [f.name for f in abscrete_concrete_fields(tm.SingleTableLeaf21)],
+            ['id', 'field1', 'abscrete_type_singletableroot', 'field2',
+             'field21']
+        )
+
+    def test_root_queryset(self):
+        with self.assertNumQueries(1):
+            instances = list(tm.SingleTableRoot.objects.all())
+        self.assertEqual(instances, [self.leaf1, self.leaf21, self.leaf22])
+        self.assertEqual([o.__class__ for o in instances],
+                         [tm.SingleTableLeaf1, tm.SingleTableLeaf21,
+                          tm.SingleTableLeaf22])
+        self.assertEqual(instances[0].field11, 11)
+        self.assertEqual(instances[1].field21, '21')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                tm.SingleTableRoot.objects.get(field1=2).field21, '21'
+            )
+
+    def test_full_clean(self):
+        tm.SingleTableLeaf21(field1=2, field2='x', field21='t').full_clean()
+        tm.SingleTableLeaf1(field1=1, field11=11).full_clean()
+
+        with self.assertRaises(ValidationError) as cm:
+            tm.SingleTableLeaf21(field1=2, field2='x').full_clean()
+        self.assertEqual(list(cm.exception.message_dict), ['field21'])
+
+    def test_node_and_leaf_querysets(self):
+        self.assertSequenceEqual(tm.SingleTableNode2.objects.all(),
+                                 [self.leaf21, self.leaf22])
+        self.assertSequenceEqual(tm.SingleTableLeaf22.objects.all(),
+                                 [self.leaf22])
+        self.assertEqual(
+            tm.SingleTableLeaf1.objects.filter(field1__gte=2).count(), 0
+        )
+
+    def test_abscrete_instance(self):
+        root = tm.SingleTableRoot.objects.unresolved().get(pk=self.leaf21.pk)
+        self.assertEqual(root.__class__, tm.SingleTableRoot)
+        with self.assertNumQueries(0):
+            self.assertEqual(root.abscrete_instance.__class__,
+                             tm.SingleTableLeaf21)
+
+
+class UnionResolutionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = []
+        for i in range(3):
+            for kls in [tm.Leaf11, tm.Leaf111, tm.Leaf112]:
+                cls.instances.append(mommy.make(kls))
+        cls.plain_instances = [
+            mommy.make(tm.PlainLeaf1, field1=3, field11=1),
+            mommy.make(tm.PlainLeaf2, field1=1, field12='a'),
+            mommy.make(tm.PlainLeaf3, field1=2, field13='b'),
+            mommy.make(tm.PlainLeaf1, field1=2, field11=2),
+        ]
+
+    def test_root_queryset(self):
+        qs = tm.Root1.objects.resolve_with(AbscreteQuerySet.RESOLVE_UNION)
+        with self.assertNumQueries(1):
+            self.assertSequenceEqual(list(qs.order_by('pk')), self.instances)
+
+    def test_filter_order_and_slice(self):
+        qs = tm.PlainRoot.objects.resolve_with(AbscreteQuerySet.RESOLVE_UNION)
+        with self.assertNumQueries(1):
+            instances = list(qs.filter(field1__gte=2).order_by('-field1', 'pk'))
+        self.assertEqual(instances, [self.plain_instances[0],
+                                     self.plain_instances[2],
+                                     self.plain_instances[3]])
+        self.assertEqual([o.__class__ for o in instances],
+                         [tm.PlainLeaf1, tm.PlainLeaf3, tm.PlainLeaf1])
+        self.assertEqual(instances[1].field13, 'b')
+        self.assertEqual(instances[2].field11, 2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(list(qs.order_by('field1', 'pk')[1:3]),
+                             [self.plain_instances[2], self.plain_instances[3]])
+        self.assertEqual(qs.get(field1=1), self.plain_instances[1])
+        self.assertEqual(list(qs.none()), [])
+
+    def test_subquery(self):
+        qs = tm.PlainRoot.objects.filter(
+            pk__in=tm.PlainRoot.objects.filter(field1__lt=3).values('pk')
+        ).resolve_with(AbscreteQuerySet.RESOLVE_UNION).order_by('pk')
+        self.assertTrue(union.is_applicable(qs))
+        with self.assertNumQueries(1):
+            self.assertEqual(list(qs), self.plain_instances[1:])
+
+    def test_fallback(self):
+        qs = tm.PlainRoot.objects.resolve_with(
+            AbscreteQuerySet.RESOLVE_UNION
+        ).filter(plainleaf1__field11=2)
+        self.assertFalse(union.is_applicable(qs))
+        self.assertEqual(list(qs), [self.plain_instances[3]])
+
+        self.assertFalse(union.is_applicable(
+            tm.IntermediateNode.objects.all()
+        ))
+        with self.assertRaises(ValueError):
+            tm.PlainRoot.objects.resolve_with('unknown')
+
+
+class MergeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = []
+        for kls in [tm.SeveralPlainLeaf11, tm.SeveralPlainLeaf21,
+                    tm.SeveralPlainLeaf31, tm.SeveralPlainLeaf12,
+                    tm.SeveralPlainLeaf22, tm.SeveralPlainLeaf32]:
+            cls.instances.extend(mommy.make(kls, _quantity=3))
+
+        cls.querysets = [tm.SeveralPlainRoot1.objects.all(),
+                         tm.SeveralPlainRoot2.objects.all(),
+                         tm.SeveralPlainRoot3.objects.all()]
+
+    def test_merge(self):
+        merged = list(federation.merge(self.querysets, ['-pk'], batch_size=4))
+        self.assertEqual(
+            [(o.__class__, o.pk) for o in merged],
+            sorted([(o.__class__, o.pk) for o in self.instances],
+                   key=lambda t: -t[1])
+        )
+
+    def test_merge_with_limit(self):
+        with CaptureQueriesContext(connection) as queries:
+            merged = list(federation.merge(self.querysets, ['-pk'], limit=3))
+        self.assertEqual(
+            [o.pk for o in merged],
+            sorted([o.pk for o in self.instances], reverse=True)[:3]
+        )
+        # A query per root, then one per concrete model of the yielded
+        # instances only
+        self.assertEqual(len(queries),
+                         3 + len(set(o.__class__ for o in merged)))
+        for q in queries.captured_queries[:3]:
+            self.assertIn('LIMIT 3', q['sql'])
+
+
+class ParentCachesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [mommy.make(tm.LeafWithSeveralIntermediate),
+                         mommy.make(tm.Leaf2111), mommy.make(tm.Leaf211)]
+
+    def _test_parents(self, leaf):
+        with self.assertNumQueries(0):
+            node3 = leaf.intermediatenode3_ptr
+            node2 = node3.intermediatenode2_ptr
+            node1 = node2.intermediatenode1_ptr
+            root = node1.rootwithseveralnodes_ptr
+            self.assertEqual(root.__class__, tm.RootWithSeveralNodes)
+            self.assertEqual(root.pk, leaf.pk)
+            self.assertEqual(root.abscrete_branch, leaf.abscrete_branch)
+            self.assertIs(root.abscrete_instance, leaf)
+
+    def test_resolved(self):
+        for strategy in [AbscreteQuerySet.RESOLVE_BY_TYPE,
+                         AbscreteQuerySet.RESOLVE_UNION]:
+            leaf = tm.RootWithSeveralNodes.objects.resolve_with(strategy).get()
+            self._test_parents(leaf)
+
+    def test_lazy(self):
+        mommy.make(tm.LeafWithSeveralIntermediate, _quantity=20)
+        built = []
+
+        def from_db(cls, db, field_names, values):
+            built.append(cls)
+            return AbscreteModel.from_db.__func__(cls, db, field_names, values)
+
+        tm.RootWithSeveralNodes.from_db = classmethod(from_db)
+        self.addCleanup(delattr, tm.RootWithSeveralNodes, 'from_db')
+
+        # A single instance per row of each query, the root one and the leaf
+        # one : the parents are only built on access
+        with self.assertNumQueries(2):
+            leaves = list(tm.RootWithSeveralNodes.objects.all())
+        self.assertEqual(built, [tm.RootWithSeveralNodes] * 21 +
+                                [tm.LeafWithSeveralIntermediate] * 21)
+
+        del built[:]
+        self._test_parents(leaves[0])
+        self.assertEqual(built, [tm.IntermediateNode3, tm.IntermediateNode2,
+                                 tm.IntermediateNode1,
+                                 tm.RootWithSeveralNodes])
+
+    def test_several_branches(self):
+        leaves = list(tm.Root2.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual(leaves[0].node211_ptr.node21_ptr.root2_ptr.pk,
+                             leaves[0].pk)
+            self.assertEqual(leaves[1].node21_ptr.root2_ptr.pk, leaves[1].pk)
+
+
+class BulkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [
+            mommy.make(tm.LeafWithIntermediate1),
+            mommy.make(tm.LeafWithIntermediate2),
+            mommy.make(tm.LeafWithIntermediate1),
+            mommy.make(tm.LeafWithIntermediate3),
+        ]
+        cls.plain_instances = [
+            mommy.make(tm.PlainLeaf1),
+            mommy.make(tm.PlainLeaf2),
+            mommy.make(tm.PlainLeaf3),
+        ]
+
+    def test_in_bulk(self):
+        # A query for the types, then one per concrete model
+        with self.assertNumQueries(4):
+            instances = tm.RootWithOneNode.objects.in_bulk()
+        self.assertEqual(instances, {o.pk: o for o in self.instances})
+        for o in self.instances:
+            self.assertEqual(instances[o.pk].__class__, o.__class__)
+
+        pks = [self.instances[0].pk, self.instances[1].pk]
+        with self.assertNumQueries(3):
+            instances = tm.RootWithOneNode.objects.in_bulk(pks)
+        self.assertEqual(instances, {o.pk: o for o in self.instances[:2]})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(tm.RootWithOneNode.objects.in_bulk([]), {})
+
+    def limit_query_params(self, limit):
+        features = connection.features
+        if 'max_query_params' in features.__dict__:
+            self.addCleanup(setattr, features, 'max_query_params',
+                            features.max_query_params)
+        else:
+            self.addCleanup(features.__dict__.pop, 'max_query_params', None)
+        features.max_query_params = limit
+
+    def test_in_bulk_batches(self):
+        self.limit_query_params(3)
+        pks = [o.pk for o in self.instances]
+        # Two queries for the types, then the concrete models, whose pks are
+        # batched too
+        with self.assertNumQueries(5):
+            instances = tm.RootWithOneNode.objects.in_bulk(pks)
+        self.assertEqual(instances, {o.pk: o for o in self.instances})
+
+    def test_refresh_many_batches(self):
+        self.limit_query_params(2)
+        instances = [self.instances[0], self.instances[2],
+                     mommy.make(tm.LeafWithIntermediate1)]
+        tm.RootWithOneNode.objects.update(field2='http://updated.org')
+        with self.assertNumQueries(2):
+            refresh_many(instances)
+        self.assertEqual([o.field2 for o in instances],
+                         ['http://updated.org'] * 3)
+
+    def test_refresh_many(self):
+        instances = self.instances + self.plain_instances
+        tm.RootWithOneNode.objects.update(field2='http://updated.org')
+        tm.PlainRoot.objects.update(field1=42)
+
+        with self.assertNumQueries(6):
+            refresh_many(instances)
+        for o in self.instances:
+            self.assertEqual(o.field2, 'http://updated.org')
+            with self.assertNumQueries(0):
+                self.assertEqual(o.intermediatenode_ptr.field2,
+                                 'http://updated.org')
+        for o in self.plain_instances:
+            self.assertEqual(o.field1, 42)
+
+        tm.PlainRoot.objects.update(field1=43)
+        refresh_many(self.plain_instances, fields=['field1'])
+        self.assertEqual([o.field1 for o in self.plain_instances], [43] * 3)
+
+    def test_refresh_many_missing(self):
+        instance = mommy.make(tm.PlainLeaf1)
+        tm.PlainLeaf1.objects.filter(pk=instance.pk).delete()
+        with self.assertRaises(tm.PlainLeaf1.DoesNotExist):
+            refresh_many([instance])
+
+
+class ConvertTest(TestCase):
+    def test_convert_sibling(self):
+        leaf = mommy.make(tm.PlainLeaf1, field1=4)
+        converted = leaf.convert_to(tm.PlainLeaf2, field12='converted')
+
+        self.assertEqual(converted.__class__, tm.PlainLeaf2)
+        self.assertEqual(converted.pk, leaf.pk)
+        self.assertEqual(converted.field1, 4)
+        self.assertEqual(converted.field12, 'converted')
+        self.assertFalse(tm.PlainLeaf1.objects.filter(pk=leaf.pk).exists())
+        self.assertEqual(tm.PlainRoot.objects.get(pk=leaf.pk), converted)
+
+    def test_convert_keeps_shared_tables(self):
+        leaf = mommy.make(tm.LeafWithIntermediate1)
+        # Delete the rows of the leaf table, insert the row of the new leaf
+        # table and update the abscrete field : the tables of the root and the
+        # node are kept untouched
+        with CaptureQueriesContext(connection) as queries:
+            leaf.convert_to(tm.LeafWithIntermediate3)
+        # The statements, up to the name of the table they apply to
+        statements = [
+            q['sql'].split(' WHERE ')[0].split(' SET ')[0].split(' (')[0]
+            for q in queries.captured_queries
+            if q['sql'].startswith(('DELETE', 'INSERT', 'UPDATE'))
+        ]
+        self.assertEqual(statements, [
+            'DELETE FROM "tests_leafwithintermediate1"',
+            'INSERT INTO "tests_leafwithintermediate3"',
+            'UPDATE "tests_rootwithonenode"',
+        ])
+        self.assertEqual(tm.RootWithOneNode.objects.get(pk=leaf.pk).__class__,
+                         tm.LeafWithIntermediate3)
+
+    def test_convert_across_nodes(self):
+        leaf = mommy.make(tm.Leaf111)
+        converted = leaf.convert_to(tm.Leaf11)
+        self.assertFalse(tm.Node11.objects.filter(pk=leaf.pk).exists())
+        self.assertEqual(list(tm.Root1.objects.all()), [converted])
+
+        converted = converted.convert_to(tm.Leaf112)
+        self.assertTrue(tm.Node11.objects.filter(pk=leaf.pk).exists())
+        self.assertFalse(tm.Leaf11.objects.filter(pk=leaf.pk).exists())
+        self.assertEqual(list(tm.Root1.objects.all()), [converted])
+
+    def test_convert_keeps_relations(self):
+        leaf = mommy.make(tm.ForeignRelationLeaf11)
+        related = mommy.make(tm.ForeignRelationLeaf21,
+                             foreignrelationroot1=leaf)
+        leaf.convert_to(tm.ForeignRelationLeaf12)
+        related = tm.ForeignRelationRoot2.objects.get(pk=related.pk)
+        self.assertEqual(related.foreignrelationroot1_id, leaf.pk)
+        self.assertEqual(
+            related.foreignrelationroot1.abscrete_instance.__class__,
+            tm.ForeignRelationLeaf12
+        )
+
+    def test_convert_single_table(self):
+        leaf = tm.SingleTableLeaf21.objects.create(field1=1, field2='2',
+                                                   field21='21')
+        converted = leaf.convert_to(tm.SingleTableLeaf1, field11=11)
+        self.assertEqual(converted.__class__, tm.SingleTableLeaf1)
+        self.assertEqual(converted.field11, 11)
+        root = tm.SingleTableRoot.objects.unresolved().get(pk=leaf.pk)
+        self.assertIsNone(root.field2)
+        self.assertIsNone(root.field21)
+
+    def test_convert_queryset(self):
+        leaves = (mommy.make(tm.LeafWithIntermediate1, _quantity=3) +
+                  mommy.make(tm.LeafWithIntermediate2, _quantity=2))
+        converted = tm.RootWithOneNode.objects.filter(
+            pk__in=[l.pk for l in leaves[1:]]
+        ).convert_to(tm.LeafWithIntermediate4, field2='http://new.org')
+
+        self.assertEqual(converted, 4)
+        self.assertEqual(
+            [(o.__class__, o.field2) for o in tm.RootWithOneNode.objects.all()],
+            [(tm.LeafWithIntermediate1, leaves[0].field2)] +
+            [(tm.LeafWithIntermediate4, 'http://new.org')] * 4
+        )
+
+    def test_invalid_target(self):
+        leaf = mommy.make(tm.PlainLeaf1)
+        with self.assertRaises(TypeError):
+            leaf.convert_to(tm.Leaf11)
+        with self.assertRaises(TypeError):
+            leaf.convert_to(tm.PlainRoot)
+
+
+class TrackChangesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.leaf = tm.TrackedLeaf.objects.create(field1=1, field2=2, field3=3)
+
+    def _updated_tables(self, queries):
+        return [q['sql'].split()[1] for q in queries.captured_queries
+                if q['sql'].startswith('UPDATE')]
+
+    def test_changed_fields(self):
+        leaf = tm.TrackedRoot.objects.get(pk=self.leaf.pk)
+        self.assertEqual(leaf.abscrete_changed_fields, OrderedDict())
+
+        leaf.field3 = 4
+        leaf.field1 = 5
+        self.assertEqual(leaf.abscrete_changed_fields, OrderedDict([
+            (tm.TrackedRoot, ['field1']), (tm.TrackedLeaf, ['field3'])
+        ]))
+
+        self.assertIsNone(tm.TrackedLeaf(field1=1).abscrete_changed_fields)
+        self.assertIsNone(mommy.make(tm.PlainLeaf1).abscrete_changed_fields)
+
+    def test_save(self):
+        leaf = tm.TrackedLeaf.objects.get(pk=self.leaf.pk)
+        with self.assertNumQueries(0):
+            leaf.save()
+
+        leaf.field2 = 20
+        with CaptureQueriesContext(connection) as queries:
+            leaf.save()
+        self.assertEqual(self._updated_tables(queries), ['"tests_trackednode"'])
+        self.assertEqual(leaf.abscrete_changed_fields, OrderedDict())
+
+        leaf.field1 = 10
+        leaf.field3 = 30
+        with CaptureQueriesContext(connection) as queries:
+            leaf.save()
+        self.assertEqual(self._updated_tables(queries),
+                         ['"tests_trackedroot"', '"tests_trackedleaf"'])
+
+        leaf = tm.TrackedLeaf.objects.get(pk=self.leaf.pk)
+        self.assertEqual((leaf.field1, leaf.field2, leaf.field3),
+                         (10, 20, 30))
+
+    def test_save_deleted(self):
+        leaf = tm.TrackedLeaf.objects.get(pk=self.leaf.pk)
+        tm.TrackedLeaf.objects.get(pk=self.leaf.pk).delete()
+        leaf.field2 = 20
+        leaf.save()
+        leaf = tm.TrackedLeaf.objects.get(pk=self.leaf.pk)
+        self.assertEqual((leaf.field1, leaf.field2, leaf.field3), (1, 20, 3))
+
+        # Unless update_fields is given explicitly
+        tm.TrackedLeaf.objects.get(pk=self.leaf.pk).delete()
+        with self.assertRaises(DatabaseError):
+            leaf.save(update_fields=['field2'])
+
+    def test_refresh(self):
+        leaf = tm.TrackedLeaf.objects.get(pk=self.leaf.pk)
+        tm.TrackedLeaf.objects.filter(pk=leaf.pk).update(field3=33)
+        leaf.refresh_from_db()
+        self.assertEqual(leaf.abscrete_changed_fields, OrderedDict())
+
+        leaf = tm.TrackedLeaf.objects.only('field1').get(pk=self.leaf.pk)
+        self.assertEqual(leaf.field3, 33)
+        self.assertEqual(leaf.abscrete_changed_fields, OrderedDict())
+
+
+class CachedQuerySetTest(TransactionTestCase):
+    # The cache is invalidated once the writes are committed
+    available_apps = ['abscrete.tests']
+
+    def setUp(self):
+        self.instances = [mommy.make(tm.PlainLeaf1), mommy.make(tm.PlainLeaf2)]
+        cache.clear()
+
+    def test_cached(self):
+        qs = tm.PlainRoot.objects.cached()
+        with self.assertNumQueries(3):
+            self.assertEqual(list(qs.all()), self.instances)
+        with self.assertNumQueries(0):
+            instances = list(qs.all())
+        self.assertEqual(instances, self.instances)
+        self.assertEqual([o.__class__ for o in instances],
+                         [tm.PlainLeaf1, tm.PlainLeaf2])
+
+        # Other queries are cached separately
+        with self.assertNumQueries(2):
+            self.assertEqual(list(qs.filter(pk=self.instances[0].pk)),
+                             self.instances[:1])
+        with self.assertNumQueries(0):
+            self.assertEqual(len(qs.none()), 0)
+
+    def test_invalidation(self):
+        qs = tm.PlainRoot.objects.cached()
+        list(qs)
+        other_qs = tm.RootWithOneNode.objects.cached()
+        list(other_qs)
+
+        new_instance = mommy.make(tm.PlainLeaf3)
+        with self.assertNumQueries(4):
+            self.assertEqual(list(qs.all()), self.instances + [new_instance])
+        # The cache of other roots is left untouched
+        with self.assertNumQueries(0):
+            list(other_qs.all())
+
+        tm.PlainLeaf1.objects.filter(pk=self.instances[0].pk).update(field11=1)
+        with self.assertNumQueries(4):
+            self.assertEqual(list(qs.all())[0].field11, 1)
+
+        new_instance.delete()
+        with self.assertNumQueries(3):
+            self.assertEqual(list(qs.all()), self.instances)
+
+        # Single-table hierarchies can be bulk created
+        single_table_qs = tm.SingleTableRoot.objects.cached()
+        self.assertEqual(len(single_table_qs), 0)
+        tm.SingleTableLeaf1.objects.bulk_create(
+            [tm.SingleTableLeaf1(field1=1, field11=1)]
+        )
+        self.assertEqual(len(single_table_qs.all()), 1)
+
+    def test_invalidation_on_commit(self):
+        qs = tm.PlainRoot.objects.cached()
+        list(qs)
+        with transaction.atomic():
+            tm.PlainLeaf1.objects.update(field11=2)
+            # A reader could still see the previous rows
+            with self.assertNumQueries(0):
+                list(qs.all())
+        with self.assertNumQueries(3):
+            list(qs.all())
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'other': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'other',
+        },
+    })
+    def test_other_cache(self):
+        qs = tm.PlainRoot.objects.cached(cache_alias='other')
+        list(qs)
+        with self.assertNumQueries(0):
+            list(qs.all())
+        tm.PlainLeaf1.objects.update(field11=3)
+        with self.assertNumQueries(3):
+            self.assertEqual(list(qs.all())[0].field11, 3)
+
+    def test_signals_per_sender(self):
+        # The deletions of the other models are still fast
+        self.assertFalse(post_delete.has_listeners(User))
+        self.assertTrue(post_delete.has_listeners(tm.PlainLeaf1))
+
+    @override_settings(ABSCRETE_CACHE=None)
+    def test_disabled(self):
+        with self.assertRaises(ImproperlyConfigured):
+            list(tm.PlainRoot.objects.cached())
+
+
+class SnapshotTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = (mommy.make(tm.Leaf11, _quantity=2) +
+                         mommy.make(tm.Leaf111, _quantity=2) +
+                         mommy.make(tm.Leaf112, _quantity=2))
+        cls.plain_instances = [
+            mommy.make(tm.PlainLeaf1, field1=1, field11=11),
+            mommy.make(tm.PlainLeaf2, field1=1, field12='12'),
+            mommy.make(tm.PlainLeaf3, field1=2, field13='13'),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookups(self):
+        snapshot = Snapshot(tm.Root1)
+        # A query per leaf model
+        with self.assertNumQueries(3):
+            records = snapshot.all()
+        self.assertEqual([(r.model, r.pk) for r in records],
+                         [(o.__class__, o.pk) for o in self.instances])
+
+        with self.assertNumQueries(0):
+            record = snapshot.get(self.instances[2].pk)
+            self.assertEqual(record.model, tm.Leaf111)
+            self.assertEqual(
+                [r.pk for r in snapshot.instance_of(tm.Node11)],
+                [o.pk for o in self.instances[2:]]
+            )
+            self.assertEqual(
+                [r.pk for r in snapshot.instance_of(tm.Leaf11, tm.Leaf112)],
+                [o.pk for o in self.instances[:2] + self.instances[4:]]
+            )
+            with self.assertRaises(tm.Root1.DoesNotExist):
+                snapshot.get(0)
+
+        with self.assertRaises(AttributeError):
+            record.abscrete_type_root1 = 'changed'
+
+    def test_filter(self):
+        snapshot = Snapshot(tm.PlainRoot)
+        self.assertEqual([r.pk for r in snapshot.filter(field1=1)],
+                         [o.pk for o in self.plain_instances[:2]])
+        self.assertEqual(snapshot.get(field12='12').pk,
+                         self.plain_instances[1].pk)
+        self.assertEqual(snapshot.get(field1=2).field13, '13')
+        with self.assertRaises(MultipleObjectsReturned):
+            snapshot.get(field1=1)
+        with self.assertRaises(tm.PlainRoot.DoesNotExist):
+            snapshot.get(field11=12)
+
+    def test_single_table(self):
+        instances = [
+            mommy.make(tm.SingleTableLeaf1, field1=1, field11=11),
+            mommy.make(tm.SingleTableLeaf22, field1=2, field2='2'),
+        ]
+        snapshot = Snapshot(tm.SingleTableRoot)
+        self.assertEqual([(r.model, r.pk) for r in snapshot.all()],
+                         [(o.__class__, o.pk) for o in instances])
+        self.assertEqual(snapshot.get(instances[1].pk).model,
+                         tm.SingleTableLeaf22)
+        self.assertEqual(
+            [r.pk for r in snapshot.instance_of(tm.SingleTableNode2)],
+            [instances[1].pk]
+        )
+
+    def test_get_snapshot(self):
+        self.assertIs(get_snapshot(tm.PlainRoot), get_snapshot(tm.PlainRoot))
+
+
+class SnapshotRefreshTest(TransactionTestCase):
+    # The version of the hierarchy changes once the writes are committed
+    available_apps = ['abscrete.tests']
+
+    def setUp(self):
+        mommy.make(tm.PlainLeaf1, field1=1, field11=11)
+        mommy.make(tm.PlainLeaf3, field1=2, field13='13')
+        cache.clear()
+
+    def test_refresh(self):
+        snapshot = Snapshot(tm.PlainRoot)
+        self.assertEqual(len(snapshot.all()), 2)
+
+        new_instance = mommy.make(tm.PlainLeaf2)
+        self.assertEqual(len(snapshot.all()), 3)
+        self.assertEqual(snapshot.get(new_instance.pk).model, tm.PlainLeaf2)
+
+        # Other hierarchies do not trigger any refresh
+        mommy.make(tm.Leaf11)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(snapshot.all()), 3)
+
+
+class ResolutionInspectionTest(AbscreteTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = (mommy.make(tm.Leaf11, _quantity=2) +
+                         mommy.make(tm.Leaf111, _quantity=2) +
+                         [mommy.make(tm.Leaf112)])
+
+    def test_assert_queries(self):
+        results = self.assertAbscreteQueries(tm.Root1.objects.order_by('pk'))
+        self.assertEqual(results, self.instances)
+        self.assertAbscreteQueries(tm.Leaf11.objects.all())
+        self.assertAbscreteQueries(
+            tm.Root1.objects.resolve_with(AbscreteQuerySet.RESOLVE_UNION),
+            per_type=0
+        )
+        with self.assertRaises(AssertionError):
+            self.assertAbscreteQueries(tm.Root1.objects.all(), per_type=0)
+
+    def test_record_resolutions(self):
+        with record_resolutions() as passes:
+            list(tm.Root1.objects.filter(pk__in=[o.pk for o in
+                                                 self.instances[:3]]))
+            list(tm.Leaf11.objects.all())
+        self.assertEqual(len(passes), 1)
+        self.assertEqual(passes[0].count, 3)
+        self.assertEqual(sorted(m.__name__ for m in passes[0].models),
+                         ['Leaf11', 'Leaf111'])
+        self.assertEqual(sorted(q.pk_count for q in passes[0].queries), [1, 2])
+
+        # Nothing is recorded outside of the context manager
+        list(tm.Root1.objects.all())
+        self.assertEqual(len(passes), 1)
+
+    def test_explain_resolution(self):
+        # Only the pks and abscrete fields of the rows are read
+        with self.assertNumQueries(1):
+            queries = tm.Root1.objects.explain_resolution(explain=False)
+        self.assertEqual([(q.model, q.pk_count) for q in queries],
+                         [(tm.Root1, None), (tm.Leaf11, 2), (tm.Leaf111, 2),
+                          (tm.Leaf112, 1)])
+        self.assertTrue(all(q.plan is None for q in queries))
+
+        queries = tm.Root1.objects.resolve_with(
+            AbscreteQuerySet.RESOLVE_UNION
+        ).explain_resolution()
+        self.assertEqual(len(queries), 1)
+        self.assertIn('UNION ALL', queries[0].sql)
+        if hasattr(AbscreteQuerySet, 'explain'):
+            self.assertTrue(queries[0].plan)
+
+        self.assertEqual(tm.Root1.objects.none().explain_resolution(), [])
+        self.assertEqual(len(tm.Leaf11.objects.explain_resolution()), 1)
+
+
+def get_dump_values(model):
+    return [
+        (o.__class__, [getattr(o, f.attname)
+                       for f in abscrete_concrete_fields(o.__class__)])
+        for o in model.objects.order_by('pk')
+    ]
+
+
+class DumpTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [
+            mommy.make(tm.PlainLeaf1, field1=1, field11=11),
+            mommy.make(tm.PlainLeaf2, field1=2, field12='12'),
+            mommy.make(tm.PlainLeaf3, field1=3, field13=''),
+            mommy.make(tm.PlainLeaf1, field1=4, field11=41),
+        ]
+        cls.single_table_instances = [
+            mommy.make(tm.SingleTableLeaf1, field1=1, field11=11),
+            mommy.make(tm.SingleTableLeaf21, field1=2, field2='2',
+                       field21='21'),
+            mommy.make(tm.SingleTableLeaf22, field1=3, field2='3'),
+        ]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_partitions(self):
+        pks = [o.pk for o in self.instances]
+        partitions = dump.get_partitions(tm.PlainRoot, 2)
+        self.assertEqual(partitions[0], (pks[0], pks[0] + 2))
+        self.assertEqual(partitions[-1][1], pks[-1] + 1)
+        self.assertEqual(dump.get_partitions(tm.Root1, 2), [])
+
+        counts = dump.dump(tm.PlainRoot, self.directory, partition_size=2)
+        self.assertEqual(counts, {tm.PlainLeaf1: 2, tm.PlainLeaf2: 1,
+                                  tm.PlainLeaf3: 1})
+        # Only the files with rows are created
+        self.assertEqual(sorted(os.listdir(self.directory)), [
+            'tests.plainleaf1.00000.jsonl', 'tests.plainleaf1.00001.jsonl',
+            'tests.plainleaf2.00000.jsonl', 'tests.plainleaf3.00001.jsonl',
+        ])
+        with open(os.path.join(self.directory,
+                               'tests.plainleaf1.00000.jsonl')) as f:
+            self.assertEqual(json.loads(f.read()),
+                             {'pk': pks[0], 'field1': 1, 'field11': 11})
+
+    def check_roundtrip(self, root, format, tables):
+        expected = get_dump_values(root)
+        call_command('abscrete_dump', root._meta.label, self.directory,
+                     format=format, partition_size=2, stdout=six.StringIO())
+
+        root.objects.unresolved().delete()
+        # Each file is loaded with a single insert per table (plus the
+        # savepoint queries)
+        with self.assertNumQueries(len(os.listdir(self.directory)) * tables +
+                                   2):
+            call_command('abscrete_load', self.directory,
+                         stdout=six.StringIO())
+        self.assertEqual(get_dump_values(root), expected)
+
+    def test_jsonl(self):
+        self.check_roundtrip(tm.PlainRoot, 'jsonl', tables=2)
+
+    def test_csv(self):
+        self.check_roundtrip(tm.PlainRoot, 'csv', tables=2)
+
+    def test_single_table(self):
+        self.check_roundtrip(tm.SingleTableRoot, 'csv', tables=1)
+
+    def test_auto_now(self):
+        mommy.make(tm.DatedLeaf, _quantity=2)
+        self.check_roundtrip(tm.DatedRoot, 'jsonl', tables=2)
+
+    def test_workers_in_transaction(self):
+        with self.assertRaises(transaction.TransactionManagementError):
+            dump.dump(tm.PlainRoot, self.directory, partition_size=2,
+                      workers=2)
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class DumpWorkersTest(TransactionTestCase):
+    # The workers read the rows with their own connections
+    available_apps = ['abscrete.tests']
+
+    def setUp(self):
+        mommy.make(tm.PlainLeaf1, field1=1, field11=11)
+        mommy.make(tm.PlainLeaf2, field1=2, field12='12')
+        mommy.make(tm.PlainLeaf3, field1=3, field13='')
+        mommy.make(tm.PlainLeaf1, field1=4, field11=41)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_workers(self):
+        expected = get_dump_values(tm.PlainRoot)
+        counts = dump.dump(tm.PlainRoot, self.directory, partition_size=2,
+                           workers=2)
+        self.assertEqual(counts, {tm.PlainLeaf1: 2, tm.PlainLeaf2: 1,
+                                  tm.PlainLeaf3: 1})
+        self.assertEqual(len(os.listdir(self.directory)), 4)
+
+        tm.PlainRoot.objects.unresolved().delete()
+        dump.load(self.directory)
+        self.assertEqual(get_dump_values(tm.PlainRoot), expected)
+
+
+class ColumnsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [
+            mommy.make(tm.PlainLeaf1, field1=1, field11=11),
+            mommy.make(tm.PlainLeaf2, field1=2, field12='12'),
+            mommy.make(tm.PlainLeaf1, field1=3, field11=31),
+        ]
+        cls.root1_instances = (mommy.make(tm.Leaf11, _quantity=2) +
+                               mommy.make(tm.Leaf111, _quantity=2))
+        cls.single_table_instances = [
+            mommy.make(tm.SingleTableLeaf21, field1=1, field2='2',
+                       field21='21'),
+            mommy.make(tm.SingleTableLeaf1, field1=2, field11=11),
+        ]
+
+    def test_columns(self):
+        pks = [o.pk for o in self.instances]
+        # A query for the root, and one per leaf among the results
+        with self.assertNumQueries(3):
+            batches = tm.PlainRoot.objects.order_by('-field1').to_columns()
+        self.assertEqual(list(batches),
+                         [tm.PlainRoot, tm.PlainLeaf1, tm.PlainLeaf2])
+
+        root_batch = batches[tm.PlainRoot]
+        self.assertEqual(len(root_batch), 3)
+        self.assertEqual(list(root_batch.columns), [
+            'pk', 'field1', 'abscrete_type_plainroot'
+        ])
+        self.assertEqual(root_batch['pk'], pks[::-1])
+        self.assertEqual(root_batch['abscrete_type_plainroot'], [
+            'plainroot.plainleaf1', 'plainroot.plainleaf2',
+            'plainroot.plainleaf1'
+        ])
+        self.assertEqual(dict(batches[tm.PlainLeaf1].columns),
+                         {'pk': [pks[0], pks[2]], 'field11': [11, 31]})
+        self.assertEqual(dict(batches[tm.PlainLeaf2].columns),
+                         {'pk': [pks[1]], 'field12': ['12']})
+
+        # The leaves are restricted to the rows of the queryset
+        batches = tm.PlainRoot.objects.order_by('pk')[1:].to_columns()
+        self.assertEqual(batches[tm.PlainLeaf1]['pk'], [pks[2]])
+
+    def test_no_leaf_fields(self):
+        # The leaves without fields of their own are not queried
+        with self.assertNumQueries(1):
+            batches = tm.Root1.objects.to_columns()
+        self.assertEqual(batches[tm.Leaf111]['pk'],
+                         [o.pk for o in self.root1_instances[2:]])
+
+        with self.assertNumQueries(1):
+            batches = tm.Leaf11.objects.to_columns()
+        self.assertEqual(list(batches), [tm.Leaf11])
+        self.assertEqual(list(batches[tm.Leaf11].columns),
+                         ['pk', 'abscrete_type_root1'])
+
+    def test_single_table(self):
+        batches = tm.SingleTableRoot.objects.to_columns()
+        self.assertEqual(list(batches[tm.SingleTableRoot].columns),
+                         ['pk', 'field1', 'abscrete_type_singletableroot'])
+        self.assertEqual(dict(batches[tm.SingleTableLeaf21].columns), {
+            'pk': [self.single_table_instances[0].pk], 'field2': ['2'],
+            'field21': ['21']
+        })
+        self.assertEqual(dict(batches[tm.SingleTableLeaf1].columns), {
+            'pk': [self.single_table_instances[1].pk], 'field11': [11]
+        })
+
+    @skipUnless(columns.numpy, 'numpy is not installed')
+    def test_numpy(self):
+        batches = tm.PlainRoot.objects.to_columns(numpy=True)
+        self.assertEqual(batches[tm.PlainRoot]['field1'].dtype.name, 'int64')
+        self.assertEqual(batches[tm.PlainLeaf2]['field12'].dtype.name,
+                         'object')
+
+    @skipUnless(columns.pyarrow, 'pyarrow is not installed')
+    def test_arrow(self):
+        batches = tm.PlainRoot.objects.to_arrow()
+        self.assertEqual(batches[tm.PlainRoot].num_rows, 3)
+        self.assertEqual(batches[tm.PlainLeaf1].column(1).to_pylist(),
+                         [11, 31])
+
+
+class ValuesTypedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [
+            mommy.make(tm.PlainLeaf1, field1=1, field11=11),
+            mommy.make(tm.PlainLeaf2, field1=2, field12='12'),
+            mommy.make(tm.PlainLeaf3, field1=3, field13='13'),
+            mommy.make(tm.PlainLeaf1, field1=4, field11=41),
+        ]
+
+    def test_dicts(self):
+        # A query for the root, and one per type with fields of its own
+        with self.assertNumQueries(3):
+            values = tm.PlainRoot.objects.order_by('-field1').values_typed(
+                common=['pk', 'field1'],
+                per_type={tm.PlainLeaf1: ['field11'],
+                          tm.PlainLeaf2: ['field12']}
+            )
+        pks = [o.pk for o in self.instances]
+        self.assertEqual(values, [
+            {'type': 'plainroot.plainleaf1', 'pk': pks[3], 'field1': 4,
+             'field11': 41},
+            {'type': 'plainroot.plainleaf3', 'pk': pks[2], 'field1': 3},
+            {'type': 'plainroot.plainleaf2', 'pk': pks[1], 'field1': 2,
+             'field12': '12'},
+            {'type': 'plainroot.plainleaf1', 'pk': pks[0], 'field1': 1,
+             'field11': 11},
+        ])
+
+    def test_tuples(self):
+        self.assertEqual(
+            tm.PlainRoot.objects.filter(field1__lt=3).order_by('pk')
+            .values_typed(['field1'], {tm.PlainLeaf2: ['field12']},
+                          tuples=True),
+            [(tm.PlainLeaf1, 1), (tm.PlainLeaf2, 2, '12')]
+        )
+
+    def test_nodes(self):
+        instances = [mommy.make(tm.Leaf11), mommy.make(tm.Leaf111)]
+        values = tm.Root1.objects.order_by('pk').values_typed(
+            per_type={tm.Node11: ['pk']}, type_key='kind'
+        )
+        self.assertEqual(values, [{'kind': 'root1.leaf11'},
+                                  {'kind': 'root1.node11.leaf111',
+                                   'pk': instances[1].pk}])
+        with self.assertRaises(TypeError):
+            tm.Node11.objects.values_typed(per_type={tm.Leaf11: ['pk']})
+
+
+class AggregateByTypeTest(TransactionTestCase):
+    available_apps = ['abscrete.tests']
+
+    def setUp(self):
+        mommy.make(tm.PlainLeaf1, field1=1, field11=11)
+        mommy.make(tm.PlainLeaf1, field1=4, field11=41)
+        mommy.make(tm.PlainLeaf2, field1=2, field12='12')
+        mommy.make(tm.PlainLeaf3, field1=3, field13='13')
+        mommy.make(tm.PlainLeaf3, field1=5, field13='53')
+
+    def test_aggregate_by_type(self):
+        # A query per leaf
+        with self.assertNumQueries(3):
+            results = tm.PlainRoot.objects.filter(field1__gt=1).order_by(
+                'field1'
+            ).aggregate_by_type(
+                per_type={tm.PlainLeaf1: {'max11': Max('field11')},
+                          tm.PlainLeaf3: {'max13': Max('field13')}},
+                common={'count': Count('pk'), 'total': Sum('field1'),
+                        'average': Avg('field1'),
+                        'distinct': Count('field1', distinct=True)}
+            )
+        self.assertEqual(list(results), [tm.PlainRoot, tm.PlainLeaf1,
+                                         tm.PlainLeaf2, tm.PlainLeaf3])
+        self.assertEqual(results[tm.PlainRoot], {'count': 4, 'total': 14,
+                                                 'average': 3.5})
+        self.assertEqual(results[tm.PlainLeaf1], {
+            'count': 1, 'total': 4, 'average': 4, 'distinct': 1, 'max11': 41
+        })
+        self.assertEqual(results[tm.PlainLeaf2], {
+            'count': 1, 'total': 2, 'average': 2, 'distinct': 1
+        })
+        self.assertEqual(results[tm.PlainLeaf3], {
+            'count': 2, 'total': 8, 'average': 4, 'distinct': 2,
+            'max13': '53'
+        })
+
+        with self.assertRaises(TypeError):
+            tm.PlainLeaf1.objects.aggregate_by_type(
+                per_type={tm.PlainLeaf2: {'max12': Max('field12')}}
+            )
+
+    def test_nodes(self):
+        for model in [tm.Leaf11, tm.Leaf111, tm.Leaf111, tm.Leaf112]:
+            mommy.make(model)
+        results = tm.Root1.objects.aggregate_by_type(
+            {'count': Count('pk')}
+        )
+        self.assertEqual(list(results), [tm.Root1, tm.Leaf11, tm.Node11,
+                                         tm.Leaf111, tm.Leaf112])
+        self.assertEqual([r['count'] for r in results.values()],
+                         [4, 1, 3, 2, 1])
+
+    def test_sliced(self):
+        results = tm.PlainRoot.objects.order_by('-field1')[:2] \
+            .aggregate_by_type({'total': Sum('field1'),
+                                'minimum': Min('field1')})
+        self.assertEqual(results[tm.PlainRoot], {'total': 9, 'minimum': 4})
+        self.assertEqual(results[tm.PlainLeaf2],
+                         {'total': None, 'minimum': None})
+
+    def test_parallel(self):
+        self.assertEqual(
+            tm.PlainRoot.objects.aggregate_by_type(
+                {'total': Sum('field1')}, parallel=True
+            ),
+            tm.PlainRoot.objects.aggregate_by_type({'total': Sum('field1')})
+        )
+
+    def test_reserved_names(self):
+        results = tm.PlainRoot.objects.aggregate_by_type(
+            {'per_type': Count('pk'), 'parallel': Sum('field1')}
+        )
+        self.assertEqual(results[tm.PlainRoot],
+                         {'per_type': 5, 'parallel': 15})
+
+
+class RawTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [
+            mommy.make(tm.PlainLeaf1, field1=1, field11=11),
+            mommy.make(tm.PlainLeaf2, field1=2, field12='12'),
+            mommy.make(tm.PlainLeaf1, field1=3, field11=31),
+        ]
+        cls.single_table_instances = [
+            mommy.make(tm.SingleTableLeaf1, field1=1, field11=11),
+            mommy.make(tm.SingleTableLeaf21, field1=2, field2='2',
+                       field21='21'),
+        ]
+
+    def test_raw(self):
+        # The raw query, then a query per concrete model
+        with self.assertNumQueries(3):
+            objects = list(tm.PlainRoot.objects.raw(
+                'SELECT * FROM tests_plainroot ORDER BY id DESC'
+            ))
+        self.assertEqual(objects, self.instances[::-1])
+        self.assertEqual(objects[0].field11, 31)
+
+        with self.assertNumQueries(1):
+            objects = list(tm.SingleTableRoot.objects.raw(
+                'SELECT * FROM tests_singletableroot ORDER BY id'
+            ))
+        self.assertEqual([o.__class__ for o in objects],
+                         [tm.SingleTableLeaf1, tm.SingleTableLeaf21])
+
+        objects = list(tm.PlainLeaf1.objects.raw(
+            'SELECT * FROM tests_plainleaf1 '
+            'JOIN tests_plainroot ON plainroot_ptr_id = id'
+        ))
+        self.assertEqual(objects, [self.instances[0], self.instances[2]])
+
+    def test_batches(self):
+        raw = tm.PlainRoot.objects.raw('SELECT * FROM tests_plainroot')
+        raw.batch_size = 2
+        # Each batch makes a query per concrete model
+        with self.assertNumQueries(4):
+            self.assertEqual(list(raw), self.instances)
+
+    def test_missing_abscrete_field(self):
+        with self.assertRaises(InvalidQuery):
+            list(tm.PlainRoot.objects.raw('SELECT id FROM tests_plainroot'))
+
+    def test_using(self):
+        raw = tm.PlainRoot.objects.raw('SELECT * FROM tests_plainroot')
+        self.assertEqual(list(raw.using('default')), self.instances)
+
+
+class IntegrityTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [mommy.make(tm.Leaf11), mommy.make(tm.Leaf111),
+                         mommy.make(tm.Leaf112), mommy.make(tm.Leaf11)]
+
+    def corrupt(self):
+        leaf11, leaf111, leaf112, other = self.instances
+        tm.Root1.objects.filter(pk=leaf111.pk).update(
+            abscrete_type_root1='root1.leaf11'
+        )
+        tm.Root1.objects.filter(pk=other.pk).update(
+            abscrete_type_root1='root1.unknown'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM tests_leaf112 WHERE node11_ptr_id = %s',
+                           [leaf112.pk])
+
+    def test_check(self):
+        # A query for the unknown types, and two per model below the root
+        with self.assertNumQueries(9):
+            counts = integrity.check(tm.Root1)
+        self.assertEqual(sum(counts.values()), 0)
+
+        self.corrupt()
+        counts = integrity.check(tm.Root1)
+        self.assertEqual(
+            {key: count for key, count in counts.items() if count}, {
+                (tm.Root1, integrity.UNKNOWN): 1,
+                (tm.Leaf11, integrity.MISSING): 1,
+                (tm.Leaf11, integrity.EXTRA): 1,
+                (tm.Node11, integrity.EXTRA): 1,
+                (tm.Leaf111, integrity.EXTRA): 1,
+                (tm.Leaf112, integrity.MISSING): 1,
+            }
+        )
+
+    def test_repair(self):
+        self.corrupt()
+        repaired, unrepairable = integrity.repair(tm.Root1, batch_size=1)
+        self.assertEqual(repaired, 2)
+        self.assertEqual(unrepairable, {self.instances[2].pk})
+        self.assertEqual(
+            [o.__class__ for o in tm.Root1.objects.exclude(
+                pk=self.instances[2].pk
+            ).order_by('pk')],
+            [tm.Leaf11, tm.Leaf111, tm.Leaf11]
+        )
+
+    def test_command(self):
+        out = six.StringIO()
+        call_command('abscrete_check', 'tests.Root1', stdout=out)
+        self.assertEqual(out.getvalue(), 'No mismatch\n')
+
+        self.corrupt()
+        out = six.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('abscrete_check', 'tests.Root1', stdout=out)
+        self.assertIn('tests.Leaf112: 1 missing rows', out.getvalue())
+
+        out = six.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('abscrete_check', 'tests.Root1', fix=True, stdout=out)
+        self.assertIn('tests.Leaf112: 1 missing rows', out.getvalue())
+        self.assertIn('2 rows repaired', out.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('abscrete_check', 'tests.Leaf11')
+        with self.assertRaises(TypeError):
+            integrity.repair(tm.SingleTableRoot)
+
+
+class LockBranchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [mommy.make(tm.Leaf111), mommy.make(tm.Leaf11),
+                         mommy.make(tm.Leaf112), mommy.make(tm.Leaf111)]
+
+    def test_root(self):
+        # The root, then the node, then each leaf
+        with self.assertNumQueries(5):
+            locked = tm.Root1.objects.order_by('-pk').lock_branch()
+        self.assertEqual(locked, self.instances[::-1])
+
+        with CaptureQueriesContext(connection) as context:
+            locked = tm.Root1.objects.filter(
+                pk__in=[self.instances[0].pk, self.instances[1].pk]
+            ).lock_branch(skip_locked=True)
+        self.assertEqual(locked, self.instances[:2])
+        tables = [q['sql'].split(' FROM ')[1].split()[0]
+                  for q in context.captured_queries]
+        self.assertEqual(tables, ['"tests_root1"', '"tests_node11"',
+                                  '"tests_leaf111"', '"tests_leaf11"'])
+
+    def test_leaf(self):
+        with self.assertNumQueries(3):
+            locked = tm.Leaf111.objects.all().lock_branch(nowait=True)
+        self.assertEqual(locked, [self.instances[0], self.instances[3]])
+
+    def test_single_table(self):
+        instances = [mommy.make(tm.SingleTableLeaf1, field1=1, field11=1),
+                     mommy.make(tm.SingleTableLeaf22, field1=2, field2='2')]
+        with self.assertNumQueries(1):
+            locked = tm.SingleTableRoot.objects.order_by('pk').lock_branch()
+        self.assertEqual(locked, instances)
+
+
+class FlatViewTest(TransactionTestCase):
+    available_apps = ['abscrete.tests']
+
+    def setUp(self):
+        self.instances = [
+            mommy.make(tm.Leaf11),
+            mommy.make(tm.Leaf111),
+            mommy.make(tm.Leaf112),
+        ]
+        self.plain_instances = [
+            mommy.make(tm.PlainLeaf1, field1=1, field11=11),
+            mommy.make(tm.PlainLeaf2, field1=2, field12='12'),
+        ]
+        state = ProjectState.from_apps(django_apps)
+        with connection.schema_editor() as editor:
+            for root in [tm.Root1, tm.PlainRoot]:
+                flat.CreateFlatView(root.__name__).database_forwards(
+                    'tests', editor, ProjectState(), state
+                )
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            for root in [tm.Root1, tm.PlainRoot]:
+                flat.drop_view(root, editor)
+
+    def test_columns(self):
+        self.assertEqual(
+            [alias for _, _, alias in flat.get_view_columns(tm.PlainRoot)],
+            ['id', 'field1', 'abscrete_type_plainroot', 'plainleaf1_field11',
+             'plainleaf2_field12', 'plainleaf3_field13']
+        )
+
+    def test_flat_model(self):
+        PlainRootFlat = flat.get_flat_model(tm.PlainRoot)
+        self.assertIs(flat.get_flat_model(tm.PlainRoot), PlainRootFlat)
+
+        # A single query on the view
+        with self.assertNumQueries(1):
+            objects = list(PlainRootFlat.objects.order_by('id'))
+        self.assertEqual(objects, self.plain_instances)
+        self.assertEqual(objects[0].field11, 11)
+        self.assertEqual(objects[1].field12, '12')
+        self.assertEqual(
+            list(PlainRootFlat.objects.filter(plainleaf1_field11=11)),
+            self.plain_instances[:1]
+        )
+        self.assertEqual(
+            list(PlainRootFlat.objects.values_list('plainleaf2_field12',
+                                                   flat=True).order_by('id')),
+            [None, '12']
+        )
+
+        with self.assertNumQueries(1):
+            objects = list(flat.get_flat_model(tm.Root1).objects.order_by('id'))
+        self.assertEqual(objects, self.instances)
+        self.assertEqual(objects[1].root1_ptr_id, self.instances[1].pk)
+
+        with self.assertRaises(TypeError):
+            PlainRootFlat(id=1, field1=1).save()
+        with self.assertRaises(TypeError):
+            PlainRootFlat.objects.update(field1=2)
+        with self.assertRaises(TypeError):
+            PlainRootFlat.objects.filter(field1=1).delete()
+
+    def test_deconstruct(self):
+        # Plain views by default, which are never stale
+        self.assertEqual(flat.CreateFlatView('PlainRoot').deconstruct(),
+                         ('CreateFlatView', [], {'model_name': 'PlainRoot'}))
+        self.assertEqual(
+            flat.CreateFlatView('PlainRoot', materialized=True).deconstruct(),
+            ('CreateFlatView', [],
+             {'model_name': 'PlainRoot', 'materialized': True})
+        )
+
+    def test_backwards(self):
+        state = ProjectState.from_apps(django_apps)
+        with connection.schema_editor() as editor:
+            flat.CreateFlatView('PlainRoot').database_backwards(
+                'tests', editor, state, ProjectState()
+            )
+        self.assertNotIn(flat.get_view_name(tm.PlainRoot),
+                         connection.introspection.table_names(
+                             include_views=True))
+
+    def test_drop(self):
+        state = ProjectState.from_apps(django_apps)
+        operation = flat.DropFlatView('PlainRoot')
+        with connection.schema_editor() as editor:
+            operation.database_forwards('tests', editor, state, state)
+        self.assertNotIn(flat.get_view_name(tm.PlainRoot),
+                         connection.introspection.table_names(
+                             include_views=True))
+
+        with connection.schema_editor() as editor:
+            operation.database_backwards('tests', editor, state, state)
+        self.assertEqual(
+            len(flat.get_flat_model(tm.PlainRoot).objects.all()), 2
+        )
+        self.assertEqual(operation.describe(),
+                         'Drop the flat view of PlainRoot')
+
+
+class SummaryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [
+            tm.SummaryLeaf1.objects.create(field1=1, field2=2, field11=11,
+                                           date11=datetime.date(2017, 1, 1),
+                                           field12='12'),
+            tm.SummaryLeaf2.objects.create(
+                field1=3, field22='22',
+                time22=datetime.datetime(2017, 1, 1, 12, 30, 15, 123456)
+            ),
+        ]
+
+    def test_write_through(self):
+        self.assertEqual(
+            tm.SummaryRoot.objects.unresolved().get(
+                pk=self.instances[0].pk
+            ).abscrete_summary_summaryroot,
+            {'field2': 2, 'field11': 11, 'date11': '2017-01-01'}
+        )
+
+        leaf = tm.SummaryLeaf1.objects.get(pk=self.instances[0].pk)
+        leaf.field11 = 12
+        leaf.save(update_fields=['field11'])
+        tm.SummaryLeaf2.objects.update(field22='23')
+        self.assertEqual(
+            list(tm.SummaryRoot.objects.unresolved().order_by('pk')
+                 .values_list('abscrete_summary_summaryroot', flat=True)),
+            [{'field2': 2, 'field11': 12, 'date11': '2017-01-01'},
+             {'field22': '23', 'time22': '2017-01-01T12:30:15.123456'}]
+        )
+
+    def test_node_save(self):
+        node = tm.SummaryNode.objects.unresolved().get(
+            pk=self.instances[0].pk
+        )
+        node.field2 = 3
+        node.save()
+        self.assertEqual(
+            tm.SummaryRoot.objects.unresolved().get(
+                pk=self.instances[0].pk
+            ).abscrete_summary_summaryroot,
+            {'field2': 3, 'field11': 11, 'date11': '2017-01-01'}
+        )
+
+    def test_resolution(self):
+        # No query on the tables of the leaves
+        with self.assertNumQueries(1):
+            objects = list(tm.SummaryRoot.objects.order_by('pk').resolve_with(
+                AbscreteQuerySet.RESOLVE_SUMMARY
+            ))
+            self.assertEqual(objects, self.instances)
+            self.assertEqual(objects[0].field1, 1)
+            self.assertEqual(objects[0].field2, 2)
+            self.assertEqual(objects[0].date11, datetime.date(2017, 1, 1))
+            self.assertEqual(objects[1].field22, '22')
+            self.assertEqual(objects[1].time22, self.instances[1].time22)
+
+        # The other fields are deferred
+        with self.assertNumQueries(1):
+            self.assertEqual(objects[0].field12, '12')
+
+        self.assertEqual(
+            len(tm.SummaryRoot.objects.resolve_with(
+                AbscreteQuerySet.RESOLVE_SUMMARY
+            ).explain_resolution(explain=False)), 1
+        )
+
+    def test_convert(self):
+        self.instances[1].convert_to(tm.SummaryLeaf1, field2=5, field11=6,
+                                     date11=datetime.date(2017, 2, 1),
+                                     field12='')
+        self.assertEqual(
+            tm.SummaryRoot.objects.unresolved().get(
+                pk=self.instances[1].pk
+            ).abscrete_summary_summaryroot,
+            {'field2': 5, 'field11': 6, 'date11': '2017-02-01'}
+        )
+
+
+class SortFieldTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instances = [
+            mommy.make(tm.SortedLeaf1, field1=0, field11=3),
+            mommy.make(tm.SortedLeaf21, field1=0, field2=5),
+            mommy.make(tm.SortedLeaf22, field1=0, field2=1),
+            mommy.make(tm.SortedLeaf3, field1=4),
+            mommy.make(tm.SortedLeaf1, field1=0, field11=2),
+        ]
+
+    def test_order_by(self):
+        i = self.instances
+        self.assertEqual(list(tm.SortedRoot.objects.order_by('published')),
+                         [i[2], i[4], i[0], i[3], i[1]])
+        self.assertEqual(
+            list(tm.SortedRoot.objects.order_by('-published', 'pk')),
+            [i[1], i[3], i[0], i[4], i[2]]
+        )
+        self.assertEqual(list(tm.SortedNode2.objects.order_by('published')),
+                         [i[2], i[1]])
+        self.assertEqual(list(tm.SortedLeaf1.objects.order_by('-published')),
+                         [i[0], i[4]])
+
+    def test_sql(self):
+        with CaptureQueriesContext(connection) as queries:
+            list(tm.SortedRoot.objects.order_by('published'))
+        sql = queries[0]['sql']
+        self.assertIn('COALESCE', sql)
+        self.assertEqual(sql.count('LEFT OUTER JOIN'), 2)
+
+    def test_top_n(self):
+        # The slice is applied by the query of the root, before resolution :
+        # only the instances of 2 concrete models are retrieved
+        with self.assertNumQueries(3):
+            self.assertEqual(
+                list(tm.SortedRoot.objects.order_by('-published')[:2]),
+                [self.instances[1], self.instances[3]]
+            )
+
+
+class ModifiedTest(TestCase):
+    def setUp(self):
+        self.instances = [
+            mommy.make(tm.ModifiedLeaf1, field1=1, field2=2, field3=3),
+            mommy.make(tm.ModifiedLeaf2, field1=1),
+            mommy.make(tm.ModifiedLeaf1, field1=1, field2=2, field3=3),
+        ]
+
+    def get_modified(self, obj):
+        return tm.ModifiedRoot.objects.unresolved().values_list(
+            'abscrete_modified_modifiedroot', flat=True
+        ).get(pk=obj.pk)
+
+    def test_save(self):
+        obj = self.instances[0]
+        self.assertIsNotNone(self.get_modified(obj))
+
+        # Only the table of the leaf is written, but the root row is updated
+        before = timezone.now()
+        obj.field3 = 4
+        obj.save(update_fields=['field3'])
+        self.assertGreaterEqual(self.get_modified(obj), before)
+        self.assertEqual(obj.abscrete_modified_modifiedroot,
+                         self.get_modified(obj))
+
+        # Nothing is written
+        obj.save(update_fields=[])
+        self.assertEqual(obj.abscrete_modified_modifiedroot,
+                         self.get_modified(obj))
+
+    def test_bulk(self):
+        before = timezone.now()
+        tm.ModifiedLeaf1.objects.filter(pk=self.instances[0].pk).update(
+            field3=5
+        )
+        self.assertGreaterEqual(self.get_modified(self.instances[0]), before)
+        self.assertLess(self.get_modified(self.instances[2]), before)
+
+        tm.ModifiedRoot.objects.filter(pk=self.instances[1].pk).convert_to(
+            tm.ModifiedLeaf1, field2=7, field3=8
+        )
+        self.assertGreaterEqual(self.get_modified(self.instances[1]), before)
+
+    @skipUnless(hasattr(AbscreteQuerySet, 'bulk_update'),
+                'bulk_update requires Django 2.2')
+    def test_bulk_update(self):
+        before = timezone.now()
+        self.instances[2].field2 = 6
+        tm.ModifiedNode.objects.bulk_update([self.instances[2]], ['field2'])
+        self.assertGreaterEqual(self.get_modified(self.instances[2]), before)
+
+    def test_changed_since(self):
+        before = timezone.now()
+        for o in [self.instances[2], self.instances[0]]:
+            o.save()
+
+        chunks = list(tm.ModifiedRoot.objects.changed_since(before,
+                                                            chunk_size=1))
+        self.assertEqual([instances for instances, _ in chunks],
+                         [[self.instances[2]], [self.instances[0]]])
+        self.assertIsInstance(chunks[0][0][0], tm.ModifiedLeaf1)
+
+        # Resuming after the first chunk, then after the last one
+        cursor = chunks[0][1]
+        self.assertEqual(
+            list(tm.ModifiedRoot.objects.changed_since(cursor=cursor)),
+            [chunks[1]]
+        )
+        self.assertEqual(
+            list(tm.ModifiedRoot.objects.changed_since(cursor=chunks[1][1])),
+            []
+        )
+        self.instances[1].save()
+        self.assertEqual(
+            [instances for instances, _ in
+             tm.ModifiedRoot.objects.changed_since(cursor=chunks[1][1])],
+            [[self.instances[1]]]
+        )
+
+        with self.assertRaises(TypeError):
+            next(tm.PlainRoot.objects.changed_since())
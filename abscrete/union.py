@@ -0,0 +1,178 @@
+from collections import OrderedDict
+
+from django.db.models import F, Value
+from django.db.models.functions import Cast
+from django.db.models.sql.where import AND
+from django.utils import six
+
+from abscrete.models import AbscreteType
+
+
+def _column_key(field):
+    # Inherited fields are shared by all the children of a model, so they are
+    # identified by the model that declares them
+    return field.model, field.attname
+
+
+def _get_ordering(queryset, columns):
+    """
+    :return: the ordering of queryset, translated into the names of the
+    columns of the union, or None if it can not be translated
+    """
+    query = queryset.query
+    opts = queryset.model._meta
+
+    ordering = list(query.order_by)
+    if not ordering and query.default_ordering:
+        ordering = list(opts.ordering)
+
+    names = {}
+    for name, (key, f) in zip(columns, columns.values()):
+        if f.model is opts.concrete_model:
+            names[f.name] = name
+    names['pk'] = names[opts.pk.name]
+
+    translated = []
+    for o in ordering:
+        if not isinstance(o, six.string_types) or o == '?':
+            return None
+        descending = o.startswith('-')
+        name = names.get(o.lstrip('-'))
+        if name is None:
+            return None
+        translated.append('-' + name if descending else name)
+
+    return translated
+
+
+def is_applicable(queryset):
+    """
+    :return: whether the concrete instances of queryset can be retrieved with
+    a single UNION ALL query : queryset must be a plain queryset on a root,
+    only filtered on the fields of the root and ordered by those fields
+    """
+    query = queryset.query
+    abscrete = queryset.model._abscrete
+
+    return (
+        abscrete.type == AbscreteType.ROOT and
+        not abscrete.single_table and
+        len(query.alias_map) <= 1 and
+        not query.distinct and
+        not query.extra and
+        not query.annotations and
+        not query.combinator and
+        not query.select_for_update and
+        not query.select_related and
+        not query.deferred_loading[0] and
+        _get_ordering(queryset, get_columns(queryset.model)) is not None
+    )
+
+
+def get_columns(model):
+    """
+    :return: an OrderedDict of all the concrete fields of the leaves below
+    model, keyed by the name of the matching column in the union
+    """
+    fields = OrderedDict()
+    for leaf in model._abscrete.tree.get_leaves(model):
+        for f in leaf._meta.concrete_fields:
+            fields.setdefault(_column_key(f), f)
+
+    return OrderedDict(
+        ('abscrete_c%i' % i, (key, f))
+        for i, (key, f) in enumerate(fields.items())
+    )
+
+
+def _get_branch(queryset, leaf, columns):
+    """
+    :return: the part of the union that selects the rows of leaf, with all the
+    filters of the root queryset, padded to the whole set of columns
+    """
+    leaf_columns = set(_column_key(f) for f in leaf._meta.concrete_fields)
+
+    branch = leaf._base_manager.using(queryset.db).order_by()
+    for name, (key, f) in columns.items():
+        if key in leaf_columns:
+            expression = F(f.name)
+        else:
+            expression = Cast(Value(None), output_field=f)
+        branch = branch.annotate(**{name: expression})
+
+    where = queryset.query.where
+    if where:
+        root_table = queryset.model._meta.db_table
+        root_alias = next(
+            alias for alias, join in branch.query.alias_map.items()
+            if join.table_name == root_table
+        )
+        base_alias = next(iter(queryset.query.alias_map))
+        # Relabeling to the same alias is refused by the subqueries
+        if base_alias == root_alias:
+            where = where.clone()
+        else:
+            where = where.relabeled_clone({base_alias: root_alias})
+        branch.query.where.add(where, AND)
+
+    return branch.values_list(*columns.keys())
+
+
+def get_union(queryset, columns=None):
+    """
+    :return: the UNION ALL of a query per leaf model below the model of
+    queryset, each of them joined to its parent tables and padded to a common
+    set of columns, with the ordering and the limits of queryset
+
+    The queryset must be one for which is_applicable returns True.
+    """
+    query = queryset.query
+    if columns is None:
+        columns = get_columns(queryset.model)
+    leaves = queryset.model._abscrete.tree.get_leaves(queryset.model)
+
+    branches = [_get_branch(queryset, leaf, columns) for leaf in leaves]
+    union = branches[0]
+    if len(branches) > 1:
+        union = union.union(*branches[1:], all=True)
+    union = union.order_by(*_get_ordering(queryset, columns))
+    if query.low_mark or query.high_mark is not None:
+        union.query.set_limits(query.low_mark, query.high_mark)
+    return union
+
+
+def union_iterator(queryset):
+    """
+    Retrieve the concrete instances of a root queryset with a single query
+    (see get_union). The rows are turned into instances of the proper leaf
+    model as they are read.
+
+    The queryset must be one for which is_applicable returns True.
+    """
+    if queryset.query.is_empty():
+        return
+
+    model = queryset.model
+    db = queryset.db
+    columns = get_columns(model)
+    leaves = model._abscrete.tree.get_leaves(model)
+    union = get_union(queryset, columns)
+
+    # For each leaf, the positions of its fields within the columns of the
+    # union
+    keys = [key for key, _ in columns.values()]
+    plans = {}
+    for leaf in leaves:
+        fields = leaf._meta.concrete_fields
+        plans[leaf._abscrete.field_value] = (
+            leaf,
+            [f.attname for f in fields],
+            [keys.index(_column_key(f)) for f in fields]
+        )
+    type_index = keys.index(_column_key(model._meta.get_field(
+        model._abscrete.field_name
+    )))
+
+    for row in union:
+        leaf, attnames, indexes = plans[row[type_index]]
+        yield leaf.from_db(db, attnames, [row[i] for i in indexes])
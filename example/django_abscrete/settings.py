@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     'django_extensions',
+    'abscrete',
 
     'example_app.apps.ExampleAppConfig'
 ]
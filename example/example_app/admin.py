@@ -1,3 +1,18 @@
 from django.contrib import admin
 
-# Register your models here.
+from abscrete.admin import AbscreteModelAdmin, AbscreteTypeListFilter
+
+from .models import CreativeWork, NewsArticle, SocialMediaPosting, Movie
+
+
+@admin.register(CreativeWork)
+class CreativeWorkAdmin(AbscreteModelAdmin):
+    list_display = ('title', 'creator', '__str__')
+    list_filter = (AbscreteTypeListFilter,)
+    # The string representation of the objects depends on their concrete type
+    abscrete_list_display = ('__str__',)
+
+
+admin.site.register(NewsArticle)
+admin.site.register(SocialMediaPosting)
+admin.site.register(Movie)
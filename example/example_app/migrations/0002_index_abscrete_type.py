@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='creativework',
+            name='abscrete_type_creativework',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from abscrete.flat import CreateFlatView
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example_app', '0002_index_abscrete_type'),
+    ]
+
+    operations = [
+        CreateFlatView('CreativeWork'),
+    ]
@@ -16,7 +16,11 @@ if not settings.configured:
             'default': {
                 'ENGINE': 'django.db.backends.sqlite3',
                 'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-            }
+            },
+            'replica': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+            },
         },
         TEST_RUNNER="django.test.runner.DiscoverRunner",
         INSTALLED_APPS=(
@@ -25,6 +29,7 @@ if not settings.configured:
             'django.contrib.messages',
             'django.contrib.sites',
             'django.contrib.admin',
+            'abscrete',
             'abscrete.tests.apps.TestsConfig',
         ),
         MIDDLEWARE_CLASSES=(),
@@ -50,6 +55,7 @@ if not settings.configured:
             },
         ],
         ROOT_URLCONF=None,
+        ABSCRETE_CACHE='default',
     )
 
 